@@ -1,7 +1,19 @@
 
 from django.shortcuts import render
 from django.http import JsonResponse
+from django.core.cache import cache
+from django.conf import settings
 import requests
+import sys
+import time
+
+# Add project root to Python path
+sys.path.append(str(settings.BASE_DIR.parent))
+
+try:
+    from price_scrapers.live_rates import get_live_index
+except ImportError:
+    get_live_index = None
 
 CURRENCIES = [
     {"code": "IRT", "name": "Iranian Toman (IRT)"},
@@ -171,32 +183,67 @@ CURRENCIES = [
 ]
 
 
+# Fallback when no live file has a recent EUR quote
 IRT_PER_EUR = 101290
+# Live files older than this are ignored
+LIVE_FILE_MAX_AGE = 36 * 60 * 60
 
-def get_live_rate(base, target):
-    """Fetch live rate from open.er-api.com"""
-    url = f"https://open.er-api.com/v6/latest/{base}"
+ER_API_URL = "https://open.er-api.com/v6/latest/{base}"
+# Table every cross rate can be derived from when the base's own table isn't cached
+REFERENCE_BASE = "USD"
+# Used when a response has no usable time_next_update_unix
+RATES_TABLE_MIN_TTL = 60
+
+def get_rates_table(base, fetch=True):
+    """Whole open.er-api rate table of a base, cached until its next upstream update"""
+    key = f"er_api_rates:{base}"
+    rates = cache.get(key)
+    if rates is not None or not fetch:
+        return rates
     try:
-        resp = requests.get(url, timeout=5)
+        resp = requests.get(ER_API_URL.format(base=base), timeout=5)
         data = resp.json()
-        if data.get("result") == "success":
-            return data["rates"].get(target)
     except Exception:
-        pass
-    return None
+        return None
+    if data.get("result") != "success":
+        return None
+    rates = data["rates"]
+    timeout = (data.get("time_next_update_unix") or 0) - time.time()
+    cache.set(key, rates, timeout if timeout > 0 else RATES_TABLE_MIN_TTL)
+    return rates
+
+def get_live_rate(base, target):
+    """Live rate from open.er-api.com, derived from one cached rate table"""
+    rates = get_rates_table(base, fetch=False)
+    if rates is not None:
+        return rates.get(target)
+    rates = get_rates_table(REFERENCE_BASE)
+    if not rates or not rates.get(base) or not rates.get(target):
+        return None
+    return rates[target] / rates[base]
+
+def get_irt_per_eur():
+    """Toman per EUR from the scraped live files, read from memory unless a file changed"""
+    if get_live_index is not None:
+        found = get_live_index().quote("EUR", max_age=LIVE_FILE_MAX_AGE)
+        if found:
+            _, quote = found
+            return quote.get("sell") or quote.get("buy")
+    return IRT_PER_EUR
 
 def convert(amount, from_code, to_code):
     """Main conversion logic"""
+    irt_per_eur = get_irt_per_eur()
     # IRT <-> EUR direct
     if (from_code == "IRT" and to_code == "EUR"):
-        result = round(amount / IRT_PER_EUR, 4)
+        result = round(amount / irt_per_eur, 4)
         return f"{result:,.4f}".rstrip('0').rstrip('.')
     if (from_code == "EUR" and to_code == "IRT"):
-        result = round(amount * IRT_PER_EUR, 2)
+        result = round(amount * irt_per_eur, 2)
         return f"{result:,.0f}" if result == int(result) else f"{result:,.2f}"
     # IRT <-> other (via EUR/USD)
     if from_code == "IRT":
-        eur_amount = amount / IRT_PER_EUR
+        eur_amount = amount / irt_per_eur
         if to_code == "USD":
             rate = get_live_rate("EUR", "USD")
             if rate:
@@ -214,7 +261,7 @@ def convert(amount, from_code, to_code):
             rate = get_live_rate("EUR", "USD")
             if rate:
                 eur_amount = amount / rate
-                result = round(eur_amount * IRT_PER_EUR, 2)
+                result = round(eur_amount * irt_per_eur, 2)
                 return f"{result:,.0f}" if result == int(result) else f"{result:,.2f}"
         else:
             rate_usd_from = get_live_rate("USD", from_code)
@@ -222,7 +269,7 @@ def convert(amount, from_code, to_code):
             if rate_usd_from and rate_eur_usd:
                 usd_amount = amount / rate_usd_from
                 eur_amount = usd_amount / rate_eur_usd
-                result = round(eur_amount * IRT_PER_EUR, 2)
+                result = round(eur_amount * irt_per_eur, 2)
                 return f"{result:,.0f}" if result == int(result) else f"{result:,.2f}"
     # Global pairs
     rate = get_live_rate(from_code, to_code)
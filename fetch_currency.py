@@ -7,19 +7,26 @@ from datetime import datetime, timezone, timedelta
 FILE_PATH = "exchange_rate.json"
 CET = timezone(timedelta(hours=1))  # Central European Time
 
-def fetch_conversion_rate():
-    url = "https://alanchand.com/currencies-price/eur"
+URL = "https://alanchand.com/currencies-price/eur"
+
+def parse_conversion_rate(html):
+    """Extract the EUR price in Toman from the alanchand EUR page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    conversion_element = soup.select_one('td[data-v-c1354816=\"\"]:nth-of-type(2)')
+    if not conversion_element:
+        return None
+    return float(conversion_element.text.replace(',', '').replace('تومان', '').strip())
+
+def fetch_conversion_rate(url=URL, timeout=10):
     headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(url, headers=headers)
+    response = requests.get(url, headers=headers, timeout=timeout)
     if response.status_code != 200:
         print("Failed to fetch page")
         return None
-    soup = BeautifulSoup(response.text, 'html.parser')
-    conversion_element = soup.select_one('td[data-v-c1354816=\"\"]:nth-of-type(2)')
-    if not conversion_element:
+    conversion_rate = parse_conversion_rate(response.text)
+    if conversion_rate is None:
         print("Failed to extract rate")
         return None
-    conversion_rate = float(conversion_element.text.replace(',', '').replace('تومان', '').strip())
     return conversion_rate
 
 def update_json(conversion_rate):
@@ -41,8 +48,13 @@ def update_json(conversion_rate):
         "timestamp": datetime.now(CET).isoformat() + " CET"
     })
 
-    with open(FILE_PATH, "w", encoding="utf-8") as f:
+    # Replace the file atomically; the bot and web app read it while it is updated
+    tmp_path = FILE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, FILE_PATH)
 
     print("Updated exchange_rate.json.")
 
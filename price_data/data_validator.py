@@ -1,8 +1,63 @@
 import json
 import os
 import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FILES = ["alanchand_live.json", "bonbast_live.json", "tgju_live.json"]
+SOURCES = ["alanchand", "bonbast", "tgju"]
+HISTORY_DIR = os.path.join(BASE_DIR, "history")
+STATE_FILE = os.path.join(BASE_DIR, ".validator_state.json")
+HEAD_BYTES = 4096
+CHUNK_SIZE = 64 * 1024  # characters read at a time from legacy files
+MIN_CURRENCIES = 3
+
+
+def check_price(code, field, value):
+    """Error message for an invalid price, or None"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        return f"{code} has invalid '{field}' = {value}"
+    return None
+
+
+def check_snapshot(data, min_currencies=MIN_CURRENCIES):
+    """
+    Validate a full snapshot (live file or history keyframe).
+
+    Returns:
+        list: error messages, empty if the snapshot is valid
+    """
+    if not isinstance(data, dict) or "updated_at" not in data or "currencies" not in data:
+        return ["missing 'updated_at' or 'currencies'."]
+
+    errors = []
+    currencies = data["currencies"]
+    if len(currencies) < min_currencies:
+        errors.append("has too few currencies.")
+
+    for code, details in currencies.items():
+        for field in ("buy", "sell"):
+            error = check_price(code, field, details.get(field))
+            if error:
+                errors.append(error)
+    return errors
+
+
+def check_record(record):
+    """Validate one history record: a full keyframe or a delta"""
+    if isinstance(record, dict) and record.get("kind") == "delta":
+        if "updated_at" not in record or not isinstance(record.get("changed"), dict):
+            return ["delta record missing 'updated_at' or 'changed'."]
+        errors = []
+        for code, details in record["changed"].items():
+            for field in ("buy", "sell"):
+                error = check_price(code, field, details.get(field))
+                if error:
+                    errors.append(error)
+        return errors
+    return check_snapshot(record)
+
 
 def validate_json(file_path):
     if not os.path.exists(file_path):
@@ -12,42 +67,241 @@ def validate_json(file_path):
     try:
         with open(file_path, "r", encoding="utf-8") as f:
             data = json.load(f)
+    except Exception as e:
+        print(f"ERROR: Failed to read {file_path}: {e}")
+        return False
 
-        if "updated_at" not in data or "currencies" not in data:
-            print(f"ERROR: {file_path} missing 'updated_at' or 'currencies'.")
-            return False
+    errors = check_snapshot(data)
+    for error in errors:
+        print(f"ERROR: {file_path}: {error}")
+    if errors:
+        return False
 
-        currencies = data["currencies"]
+    print(f"SUCCESS: {file_path} looks good.")
+    return True
 
-        if len(currencies) < 3:
-            print(f"ERROR: {file_path} has too few currencies.")
-            return False
 
-        for code, details in currencies.items():
-            buy = details.get("buy")
-            sell = details.get("sell")
+def _head_crc(path):
+    """Checksum of the start of a file, used to notice rewritten files"""
+    with open(path, "rb") as f:
+        return zlib.crc32(f.read(HEAD_BYTES))
 
-            if not isinstance(buy, (int, float)) or buy <= 0:
-                print(f"ERROR: {file_path}: {code} has invalid 'buy' = {buy}")
-                return False
 
-            if not isinstance(sell, (int, float)) or sell <= 0:
-                print(f"ERROR: {file_path}: {code} has invalid 'sell' = {sell}")
-                return False
+def validate_jsonl(path, start=0, start_line=0):
+    """
+    Stream a JSONL history segment from a byte offset.
 
-        print(f"SUCCESS: {file_path} looks good.")
-        return True
+    Returns:
+        tuple: (path, errors as (line, message), end offset, last line number)
+    """
+    errors = []
+    offset = start
+    line_no = start_line
+    with open(path, "rb") as f:
+        f.seek(start)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                # Incomplete last line; validate it once it is finished
+                break
+            line_no += 1
+            offset += len(raw)
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+            except ValueError as e:
+                errors.append((line_no, f"invalid JSON: {e}"))
+                continue
+            for error in check_record(record):
+                errors.append((line_no, error))
+    return path, errors, offset, line_no
 
-    except Exception as e:
-        print(f"ERROR: Failed to read {file_path}: {e}")
-        return False
 
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of a top-level JSON array, reading fixed-size chunks.
 
-def main():
-    all_good = True
-    for file in FILES:
-        if not validate_json(file):
+    Only the unread part of the current chunk and the element being decoded
+    are kept in memory, however large the file is.
+
+    Raises:
+        ValueError: if the top level is not an array or the JSON is invalid
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise ValueError("top level is not a JSON array")
+    pos += 1
+    while True:
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise ValueError("unterminated JSON array")
+        if buffer[pos] == "]":
+            return
+        if buffer[pos] == ",":
+            pos += 1
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            if eof:
+                raise
+            # The element continues in the next chunk
+            fill()
+            continue
+        if end == len(buffer) and not eof:
+            # A number or literal may have been cut off at the chunk end
+            fill()
+            continue
+        pos = end
+        yield record
+
+
+def validate_legacy(path, start=0, start_line=0):
+    """
+    Stream the records of an old ``*_historical.json`` array one at a time.
+
+    Positions are reported as record indexes.
+    """
+    errors = []
+    index = 0
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            for record in iter_json_array(f):
+                if index >= start_line:
+                    for error in check_snapshot(record):
+                        errors.append((index, error))
+                index += 1
+        except ValueError as e:
+            errors.append((index, f"invalid JSON: {e}"))
+    return path, errors, os.path.getsize(path), index
+
+
+def history_files():
+    """Every history file: segments and not yet migrated legacy files"""
+    files = []
+    for source in SOURCES:
+        legacy = os.path.join(BASE_DIR, f"{source}_historical.json")
+        if os.path.exists(legacy):
+            files.append(legacy)
+        directory = os.path.join(HISTORY_DIR, source)
+        if os.path.isdir(directory):
+            files.extend(
+                os.path.join(directory, name)
+                for name in sorted(os.listdir(directory))
+                if name.endswith(".jsonl")
+            )
+    return files
+
+
+def load_state():
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    tmp_path = STATE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def _validate_file(task):
+    path, start, start_line = task
+    if path.endswith(".jsonl"):
+        return validate_jsonl(path, start, start_line)
+    return validate_legacy(path, start, start_line)
+
+
+def validate_history(full=False, workers=None):
+    """
+    Validate the history files, only reading what was added since the last run.
+
+    Files are validated in parallel and every violation is reported with its
+    position (line for segments, record index for legacy files).
+    """
+    state = {} if full else load_state()
+    tasks = []
+    carried_errors = {}
+    known_errors = 0
+    for path in history_files():
+        key = os.path.relpath(path, BASE_DIR)
+        entry = state.get(key)
+        size = os.path.getsize(path)
+        head = _head_crc(path)
+        start, start_line = 0, 0
+        if entry and entry.get("head") == head and entry.get("offset", 0) <= size:
+            if entry["offset"] == size:
+                known_errors += entry.get("errors", 0)
+                continue
+            if path.endswith(".jsonl"):
+                start, start_line = entry["offset"], entry["line"]
+                carried_errors[path] = entry.get("errors", 0)
+        tasks.append((path, start, start_line))
+
+    all_good = known_errors == 0
+    if known_errors:
+        print(f"ERROR: {known_errors} violations found by earlier runs are still present "
+              f"(use --full to list them).")
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_validate_file, tasks))
+    else:
+        results = []
+
+    for path, errors, offset, line_no in results:
+        key = os.path.relpath(path, BASE_DIR)
+        for position, error in errors:
+            print(f"ERROR: {key}:{position}: {error}")
+        error_count = len(errors) + carried_errors.get(path, 0)
+        if error_count:
             all_good = False
+        else:
+            print(f"SUCCESS: {key} looks good.")
+        state[key] = {"offset": offset, "line": line_no, "head": _head_crc(path), "errors": error_count}
+
+    # Forget files that no longer exist (e.g. migrated legacy files)
+    existing = {os.path.relpath(p, BASE_DIR) for p in history_files()}
+    state = {k: v for k, v in state.items() if k in existing}
+    save_state(state)
+
+    print(f"Validated {len(results)} of {len(existing)} history files "
+          f"({len(existing) - len(results)} unchanged).")
+    return all_good
+
+
+def main():
+    args = sys.argv[1:]
+    if "--history" in args:
+        all_good = validate_history(full="--full" in args)
+    else:
+        all_good = True
+        for file in FILES:
+            if not validate_json(os.path.join(BASE_DIR, file)):
+                all_good = False
 
     if not all_good:
         sys.exit(1)
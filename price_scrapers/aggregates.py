@@ -0,0 +1,216 @@
+"""
+Incrementally maintained hourly and daily aggregates per source.
+
+Every scrape folds its snapshot into the open hourly and daily buckets
+(min/max/mean/last of buy, sell and spread per currency). When a snapshot
+falls into a new bucket, the finished one is appended as a single line to
+``price_data/aggregates/<source>/<granularity>.jsonl``. Each update costs the
+same no matter how much history exists, and readers get a few hundred rows
+instead of the raw snapshots.
+
+Usage:
+    python price_scrapers/aggregates.py rebuild [source ...]
+"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.history_store import DATA_DIR, append_record, iter_snapshots, to_epoch
+
+AGGREGATES_DIRNAME = "aggregates"
+OPEN_FILE = "_open.json"
+GRANULARITIES = {
+    "hourly": 60 * 60,
+    "daily": 24 * 60 * 60,
+}
+FIELDS = ("buy", "sell", "spread")
+
+
+def aggregates_dir(source, data_dir=None):
+    """Directory holding the aggregate tables of a source"""
+    return os.path.join(data_dir or DATA_DIR, AGGREGATES_DIRNAME, source)
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _fold(acc, value):
+    """Add one value to a running {min, max, sum, n, last} accumulator"""
+    if value is None:
+        return
+    if acc["n"] == 0:
+        acc["min"] = acc["max"] = value
+    else:
+        acc["min"] = min(acc["min"], value)
+        acc["max"] = max(acc["max"], value)
+    acc["sum"] += value
+    acc["n"] += 1
+    acc["last"] = value
+
+
+def _new_acc():
+    return {"min": None, "max": None, "sum": 0.0, "n": 0, "last": None}
+
+
+def fold_snapshot(bucket, snapshot):
+    """Fold the currencies of one snapshot into an open bucket"""
+    currencies = bucket["currencies"]
+    for code, details in snapshot.get("currencies", {}).items():
+        buy = _number(details.get("buy"))
+        sell = _number(details.get("sell"))
+        spread = sell - buy if buy is not None and sell is not None else None
+
+        entry = currencies.get(code)
+        if entry is None:
+            entry = currencies[code] = {"count": 0}
+            for field in FIELDS:
+                entry[field] = _new_acc()
+        entry["count"] += 1
+        _fold(entry["buy"], buy)
+        _fold(entry["sell"], sell)
+        _fold(entry["spread"], spread)
+
+
+def finalize(bucket):
+    """Turn an open bucket into the row stored in the aggregate table"""
+    currencies = {}
+    for code, entry in bucket["currencies"].items():
+        row = {"count": entry["count"]}
+        for field in FIELDS:
+            acc = entry[field]
+            row[field] = {
+                "min": acc["min"],
+                "max": acc["max"],
+                "mean": acc["sum"] / acc["n"] if acc["n"] else None,
+                "last": acc["last"],
+            }
+        currencies[code] = row
+    start = bucket["time"]
+    return {
+        "bucket": datetime.fromtimestamp(start, timezone.utc).isoformat(),
+        "time": start,
+        "currencies": currencies,
+    }
+
+
+def _load_open(source, data_dir=None):
+    path = os.path.join(aggregates_dir(source, data_dir), OPEN_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_open(source, state, data_dir=None):
+    path = os.path.join(aggregates_dir(source, data_dir), OPEN_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _table_path(source, granularity, data_dir=None):
+    return os.path.join(aggregates_dir(source, data_dir), f"{granularity}.jsonl")
+
+
+def _apply(source, state, snapshot, data_dir=None):
+    """Fold a snapshot into every granularity, flushing finished buckets"""
+    ts = to_epoch(snapshot.get("updated_at"))
+    if ts is None:
+        return False
+
+    changed = False
+    for granularity, step in GRANULARITIES.items():
+        start = ts // step * step
+        bucket = state.get(granularity)
+        if bucket is not None and start < bucket["time"]:
+            # Older than the open bucket; finished rows are never rewritten
+            continue
+        if bucket is not None and start > bucket["time"]:
+            path = _table_path(source, granularity, data_dir)
+            current_size = os.path.getsize(path) if os.path.exists(path) else 0
+            # A larger file means this row was written before a crash lost the state
+            if current_size <= bucket.get("size", 0):
+                bucket["size"] = append_record(path, finalize(bucket))
+            else:
+                bucket["size"] = current_size
+            bucket = {"time": start, "size": bucket["size"], "currencies": {}}
+        if bucket is None:
+            path = _table_path(source, granularity, data_dir)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            bucket = {"time": start, "size": size, "currencies": {}}
+        fold_snapshot(bucket, snapshot)
+        state[granularity] = bucket
+        changed = True
+    return changed
+
+
+def update_aggregates(source, snapshot, data_dir=None):
+    """Fold one freshly scraped snapshot into the aggregates of a source"""
+    os.makedirs(aggregates_dir(source, data_dir), exist_ok=True)
+    state = _load_open(source, data_dir)
+    if _apply(source, state, snapshot, data_dir):
+        _save_open(source, state, data_dir)
+
+
+def rebuild(source, data_dir=None):
+    """Recompute the aggregate tables of a source from its full history"""
+    directory = aggregates_dir(source, data_dir)
+    os.makedirs(directory, exist_ok=True)
+    for granularity in GRANULARITIES:
+        path = _table_path(source, granularity, data_dir)
+        if os.path.exists(path):
+            os.remove(path)
+
+    state = {}
+    count = 0
+    for snapshot in iter_snapshots(source, data_dir):
+        if _apply(source, state, snapshot, data_dir):
+            count += 1
+    _save_open(source, state, data_dir)
+    return count
+
+
+def iter_aggregates(source, granularity="daily", data_dir=None, include_open=True):
+    """
+    Yield the aggregate rows of a source, oldest first.
+
+    The still-open bucket is included (finalized on the fly) unless
+    include_open is False.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity {granularity!r}")
+
+    path = _table_path(source, granularity, data_dir)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    if include_open:
+        bucket = _load_open(source, data_dir).get(granularity)
+        if bucket and bucket["currencies"]:
+            yield finalize(bucket)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        for name in sys.argv[2:] or ["alanchand", "bonbast", "tgju"]:
+            print(f"{name}: folded {rebuild(name)} snapshots")
+    else:
+        print(__doc__)
@@ -1,13 +1,33 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-import json
 from datetime import datetime, timezone
-import time
 import os
 import re
+import sys
 
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.aggregates import update_aggregates
+from price_scrapers.history_store import append_snapshot, write_live
+from price_scrapers.http_engine import DEFAULT_TIMEOUT, fetch_html, parse_tables, cell_text
+
+URL = "https://alanchand.com/currencies-price"
+TABLE_ROW_SELECTOR = "table.CurrencyTbl tbody tr"
 DIVIDE_100 = ["JPY", "KRW", "SYP", "AMD", "IQD"]
+# Fewer rows than this means the static page did not contain the table
+MIN_CURRENCIES = 3
+
+# Reads every CurrencyTbl row in the browser as [onclick, buy text, sell text]
+EXTRACT_ROWS_JS = """
+return Array.from(document.querySelectorAll("table.CurrencyTbl tbody tr")).map(function (row) {
+    var buy = row.querySelector("td.buyPrice");
+    var sell = row.querySelector("td.sellPrice");
+    return [
+        row.getAttribute("onclick") || "",
+        buy ? buy.innerText : "",
+        sell ? sell.innerText : ""
+    ];
+});
+"""
 
 def persian_to_english_digits(text):
     """Convert Persian/Farsi digits to English digits"""
@@ -42,101 +62,112 @@ def extract_currency_code_from_url(onclick_attr):
     
     return None
 
-def get_currency_prices_selenium():
-    options = Options()
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    driver = webdriver.Chrome(options=options)
+def parse_price_text(text, first_token=False):
+    """Turn a displayed price like '۸۸,۸۵۰' into a float, or None"""
+    text = (text or "").strip()
+    if first_token:
+        # Remove any extra elements like <span> tags by splitting
+        text = text.split()[0] if text else ""
+    # Convert Persian digits to English and remove commas
+    text = persian_to_english_digits(text).replace(",", "")
+    try:
+        return float(text)
+    except ValueError:
+        return None
 
-    url = "https://alanchand.com/currencies-price"
-    driver.get(url)
-    time.sleep(5)  # Increased wait time for the new structure
+def normalize_row(onclick_attr, buy_text, sell_text):
+    """
+    Normalize the raw values of one CurrencyTbl row
 
-    now_utc = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    Returns:
+        tuple: (currency_code, buy, sell) or None if the row should be skipped
+    """
+    currency_code = extract_currency_code_from_url(onclick_attr)
+    if not currency_code:
+        return None
+
+    buy_price = parse_price_text(buy_text)
+    sell_price = parse_price_text(sell_text, first_token=True)
 
+    # Skip if both prices are None
+    if buy_price is None and sell_price is None:
+        return None
+
+    # Apply division for specific currencies
+    if currency_code in DIVIDE_100:
+        if buy_price is not None:
+            buy_price = buy_price / 100
+        if sell_price is not None:
+            sell_price = sell_price / 100
+
+    return currency_code, buy_price, sell_price
+
+def build_result(rows, now_utc):
+    """Build the live snapshot from normalized (code, buy, sell) rows"""
     result = {}
-    # Look for table rows in the currency tables
-    rows = driver.find_elements(By.CSS_SELECTOR, "table.CurrencyTbl tbody tr")
-
-    for row in rows:
-        try:
-            # Extract currency code from onclick attribute
-            onclick_attr = row.get_attribute("onclick")
-            currency_code = extract_currency_code_from_url(onclick_attr)
-            
-            if not currency_code:
-                continue
-
-            # Extract buy price
-            buy_price = None
-            try:
-                buy_cell = row.find_element(By.CSS_SELECTOR, "td.buyPrice")
-                buy_text = buy_cell.text.strip()
-                # Convert Persian digits to English and remove commas
-                buy_text = persian_to_english_digits(buy_text).replace(",", "")
-                buy_price = float(buy_text)
-            except Exception:
-                buy_price = None
-
-            # Extract sell price
-            sell_price = None
-            try:
-                sell_cell = row.find_element(By.CSS_SELECTOR, "td.sellPrice")
-                sell_text = sell_cell.text.strip()
-                # Remove any extra elements like <span> tags by splitting
-                sell_text = sell_text.split()[0] if sell_text else ""
-                # Convert Persian digits to English and remove commas
-                sell_text = persian_to_english_digits(sell_text).replace(",", "")
-                sell_price = float(sell_text)
-            except Exception:
-                sell_price = None
-
-            # Skip if both prices are None
-            if buy_price is None and sell_price is None:
-                continue
-
-            # Apply division for specific currencies
-            if currency_code in DIVIDE_100:
-                if buy_price is not None:
-                    buy_price = buy_price / 100
-                if sell_price is not None:
-                    sell_price = sell_price / 100
-
-            result[currency_code] = {
-                "buy": buy_price,
-                "sell": sell_price,
-                "timestamp": now_utc
-            }
-
-        except Exception as e:
-            # Skip problematic rows
-            continue
-
-    driver.quit()
+    for currency_code, buy_price, sell_price in rows:
+        result[currency_code] = {
+            "buy": buy_price,
+            "sell": sell_price,
+            "timestamp": now_utc
+        }
     return {
         "updated_at": now_utc,
         "currencies": result
     }
 
+def extract_rows(html):
+    """Raw [onclick, buy text, sell text] rows from the static page HTML"""
+    soup = parse_tables(html)
+    return [
+        [
+            row.get("onclick"),
+            cell_text(row.select_one("td.buyPrice")),
+            cell_text(row.select_one("td.sellPrice")),
+        ]
+        for row in soup.select(TABLE_ROW_SELECTOR)
+    ]
+
+def normalize_rows(raw_rows):
+    """Normalize raw rows from either engine, dropping the ones to skip"""
+    rows = []
+    for onclick_attr, buy_text, sell_text in raw_rows:
+        normalized = normalize_row(onclick_attr, buy_text, sell_text)
+        if normalized:
+            rows.append(normalized)
+    return rows
+
+def get_currency_prices_http(url=URL, timeout=DEFAULT_TIMEOUT):
+    """Read the price table from the static HTML without a browser"""
+    html = fetch_html(url, timeout)
+    now_utc = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    return build_result(normalize_rows(extract_rows(html)), now_utc)
+
+def get_currency_prices_selenium(url=URL):
+    # Imported here so the HTTP path works without selenium installed
+    from price_scrapers.browser import driver_session, load_page
+
+    with driver_session() as driver:
+        load_page(driver, url, TABLE_ROW_SELECTOR, label="alanchand")
+        now_utc = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+        # One script round-trip returns [onclick, buy, sell] for every row
+        raw_rows = driver.execute_script(EXTRACT_ROWS_JS) or []
+
+    return build_result(normalize_rows(raw_rows), now_utc)
+
+def get_currency_prices():
+    """Scrape over plain HTTP, falling back to Selenium if the table is missing"""
+    try:
+        data = get_currency_prices_http()
+        if len(data["currencies"]) >= MIN_CURRENCIES:
+            return data
+        print("Static alanchand page has no price table, falling back to Selenium")
+    except Exception as e:
+        print(f"HTTP scrape of alanchand failed ({e}), falling back to Selenium")
+    return get_currency_prices_selenium()
+
 if __name__ == "__main__":
-    data = get_currency_prices_selenium()
-    
-    # Get the directory where this script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(script_dir, "..", "price_data")
-
-    with open(os.path.join(data_dir, "alanchand_live.json"), "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-    all_data = []
-    historical_file = os.path.join(data_dir, "alanchand_historical.json")
-    if os.path.exists(historical_file):
-        with open(historical_file, "r", encoding="utf-8") as f:
-            try:
-                all_data = json.load(f)
-            except Exception:
-                all_data = []
-    all_data.append(data)
-    with open(historical_file, "w", encoding="utf-8") as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+    data = get_currency_prices()
+    write_live("alanchand", data)
+    append_snapshot("alanchand", data)
+    update_aggregates("alanchand", data)
@@ -0,0 +1,207 @@
+"""
+Offline benchmark of the scrapers' fetch, parse and normalize stages.
+
+Starts replay_server.py on a free port and runs every stage of every scraper
+against the recorded fixtures, so no request leaves the machine:
+
+    fetch      download the page from the replay server
+    parse      extract the raw rows from the HTML (or the bonbast export)
+    normalize  turn raw rows into the live snapshot
+
+Results are reported as median and p95 milliseconds per stage. With
+``--baseline`` the run fails when a stage's median got slower than the
+baseline by more than ``--tolerance``, which makes it usable as a CI gate.
+The benchmark workflow compares against price_scrapers/benchmark_baseline.json;
+refresh it with ``--json price_scrapers/benchmark_baseline.json`` when a
+change is meant to move the numbers.
+
+Usage:
+    python price_scrapers/benchmark.py [--iterations 50] [--latency 0]
+                                       [--json results.json]
+                                       [--baseline results.json] [--tolerance 0.5]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+# Add project root to Python path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import fetch_currency
+from price_scrapers import alanchand, bonbast, tgju
+from price_scrapers.fixtures import (
+    ALANCHAND_EUR_FIXTURE,
+    ALANCHAND_FIXTURE,
+    BONBAST_FIXTURE,
+    TGJU_FIXTURE,
+    fixture_kind,
+    parsed_count,
+    read_fixture,
+)
+from price_scrapers.http_engine import fetch_html
+from price_scrapers.replay_server import start_server
+
+DEFAULT_ITERATIONS = 50
+DEFAULT_TOLERANCE = 0.5
+# Stage timings below this are noise and never count as regressions
+MIN_REGRESSION_MS = 0.5
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def scraper_stages(base_url):
+    """
+    Stage callables per scraper.
+
+    Each stage receives the previous stage's output; fetch receives None.
+    """
+    eur_page = read_fixture(ALANCHAND_EUR_FIXTURE)
+    return {
+        "alanchand": {
+            "fetch": lambda _: fetch_html(base_url + "/currencies-price"),
+            "parse": alanchand.extract_rows,
+            "normalize": lambda raw: alanchand.build_result(alanchand.normalize_rows(raw), _now()),
+        },
+        "tgju": {
+            "fetch": lambda _: fetch_html(base_url + "/currency"),
+            "parse": tgju.extract_rows,
+            "normalize": lambda raw: tgju.build_result(tgju.normalize_rows(raw), _now()),
+        },
+        # The bonbast CLI output stands in for the subprocess call
+        "bonbast": {
+            "fetch": lambda _: fetch_html(base_url + "/bonbast/export"),
+            "parse": lambda output: bonbast.parse_bonbast_export(output, _now()),
+        },
+        # fetch_conversion_rate() downloads and parses in one call, so "fetch"
+        # covers the whole code path and "parse" times the parser on its own
+        "fetch_currency": {
+            "fetch": lambda _: fetch_currency.fetch_conversion_rate(base_url + "/currencies-price/eur"),
+            "parse": lambda _: fetch_currency.parse_conversion_rate(eur_page),
+        },
+    }
+
+
+FIXTURES = {
+    "alanchand": ALANCHAND_FIXTURE,
+    "tgju": TGJU_FIXTURE,
+    "bonbast": BONBAST_FIXTURE,
+    "fetch_currency": ALANCHAND_EUR_FIXTURE,
+}
+
+
+def check_outputs():
+    """Sanity-check the fixtures so a broken parser can't report great timings"""
+    checks = {name: parsed_count(fixture, read_fixture(fixture)) for name, fixture in FIXTURES.items()}
+    failed = [name for name, count in checks.items() if count == 0]
+    if failed:
+        raise RuntimeError(f"Fixtures produced no rates for: {', '.join(failed)}")
+    return checks
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_benchmark(iterations=DEFAULT_ITERATIONS, latency=0.0, scrapers=None):
+    """
+    Time every stage of every scraper against the replay server.
+
+    Returns:
+        dict: {scraper: {stage: {"median_ms", "p95_ms", "iterations"}}}
+    """
+    server, base_url = start_server(latency)
+    try:
+        stages = scraper_stages(base_url)
+        results = {}
+        for name, steps in stages.items():
+            if scrapers and name not in scrapers:
+                continue
+            samples = {stage: [] for stage in steps}
+            for _ in range(iterations):
+                value = None
+                for stage, fn in steps.items():
+                    start = time.perf_counter()
+                    value = fn(value)
+                    samples[stage].append((time.perf_counter() - start) * 1000)
+            results[name] = {
+                stage: {
+                    "median_ms": round(statistics.median(times), 3),
+                    "p95_ms": round(_percentile(times, 95), 3),
+                    "iterations": iterations,
+                }
+                for stage, times in samples.items()
+            }
+        return results
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Stages whose median regressed past the tolerance, as messages"""
+    regressions = []
+    for name, stages in results.items():
+        for stage, stats in stages.items():
+            before = baseline.get(name, {}).get(stage)
+            if not before:
+                continue
+            limit = before["median_ms"] * (1 + tolerance)
+            if stats["median_ms"] > limit and stats["median_ms"] - before["median_ms"] > MIN_REGRESSION_MS:
+                regressions.append(
+                    f"{name}.{stage}: {stats['median_ms']:.3f} ms vs baseline {before['median_ms']:.3f} ms"
+                )
+    return regressions
+
+
+def print_results(results):
+    print(f"{'scraper':<16}{'stage':<11}{'median ms':>11}{'p95 ms':>11}")
+    for name, stages in results.items():
+        for stage, stats in stages.items():
+            print(f"{name:<16}{stage:<11}{stats['median_ms']:>11.3f}{stats['p95_ms']:>11.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against recorded fixtures")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the replay server waits per response")
+    parser.add_argument("--scrapers", nargs="+", help="only benchmark these scrapers")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown of a stage median")
+    args = parser.parse_args()
+
+    check_outputs()
+    synthetic = [name for name, fixture in FIXTURES.items() if fixture_kind(fixture) == "synthetic"]
+    if synthetic:
+        print(f"WARNING: using synthetic fixtures for {', '.join(synthetic)}; "
+              "run 'python price_scrapers/fixtures.py record' for timings on the real pages")
+    results = run_benchmark(args.iterations, args.latency, args.scrapers)
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION: {message}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
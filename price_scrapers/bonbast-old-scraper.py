@@ -1,70 +1,80 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-import json
 from datetime import datetime, timezone
-import time
 import os
+import sys
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.aggregates import update_aggregates
+from price_scrapers.browser import driver_session, load_page
+from price_scrapers.history_store import append_snapshot, write_live
+
+# Reads every rate row as [code, name, buy text, sell text]; the code is the flag's alt text
+EXTRACT_ROWS_JS = """
+var out = [];
+document.querySelectorAll("table.table-condensed").forEach(function (table) {
+    var rows = table.getElementsByTagName("tr");
+    for (var i = 1; i < rows.length; i++) {
+        var tds = rows[i].getElementsByTagName("td");
+        if (tds.length < 4) {
+            continue;
+        }
+        var img = tds[0].getElementsByTagName("img")[0];
+        if (!img) {
+            continue;
+        }
+        out.push([img.getAttribute("alt") || "", tds[1].innerText, tds[3].innerText, tds[2].innerText]);
+    }
+});
+return out;
+"""
 
 def clean_price(text):
     return int(text.replace(",", "").replace(" ", ""))
 
 def get_currencies_bonbast():
-    options = Options()
-    options.add_argument('--headless')
-    driver = webdriver.Chrome(options=options)
-    driver.get("https://www.bon-bast.com/")
-    time.sleep(2)
+    with driver_session() as driver:
+        load_page(driver, "https://www.bon-bast.com/", "table.table-condensed", label="bonbast")
+        now_utc = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+        # One script round-trip returns [code, name, buy, sell] for every row
+        raw_rows = driver.execute_script(EXTRACT_ROWS_JS) or []
 
-    now_utc = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
     result = {}
+    for code, name, buy_text, sell_text in raw_rows:
+        code = code.upper().strip()
+        if not code:
+            continue
+
+        name = name.strip()
+
+        try:
+            sell = clean_price(sell_text)
+        except Exception:
+            sell = None
+
+        try:
+            buy = clean_price(buy_text)
+        except Exception:
+            buy = None
+
+        if "Armenian Dram" in name or code == "AMD":
+            if sell: sell = sell / 10
+            if buy: buy = buy / 10
+        if "Japanese Yen" in name or code == "JPY":
+            if sell: sell = sell / 10
+            if buy: buy = buy / 10
+        if "Iraqi Dinar" in name or code == "IQD":
+            if sell: sell = sell / 100
+            if buy: buy = buy / 100
+
+        result[code] = {
+            "code": code,
+            "name": name,
+            "buy": buy,
+            "sell": sell,
+            "timestamp": now_utc
+        }
 
-    tables = driver.find_elements(By.CSS_SELECTOR, "table.table-condensed")
-
-    for table in tables:
-        rows = table.find_elements(By.TAG_NAME, "tr")[1:]
-
-        for row in rows:
-            tds = row.find_elements(By.TAG_NAME, "td")
-            if len(tds) < 4:
-                continue
-
-            try:
-                code = tds[0].find_element(By.TAG_NAME, "img").get_attribute("alt").upper().strip()
-            except Exception:
-                continue
-
-            name = tds[1].text.strip()
-
-            try:
-                sell = clean_price(tds[2].text)
-            except Exception:
-                sell = None
-
-            try:
-                buy = clean_price(tds[3].text)
-            except Exception:
-                buy = None
-
-            if "Armenian Dram" in name or code == "AMD":
-                if sell: sell = sell / 10
-                if buy: buy = buy / 10
-            if "Japanese Yen" in name or code == "JPY":
-                if sell: sell = sell / 10
-                if buy: buy = buy / 10
-            if "Iraqi Dinar" in name or code == "IQD":
-                if sell: sell = sell / 100
-                if buy: buy = buy / 100
-
-            result[code] = {
-                "code": code,
-                "name": name,
-                "buy": buy,
-                "sell": sell,
-                "timestamp": now_utc
-            }
-
-    driver.quit()
     return {
         "updated_at": now_utc,
         "currencies": result
@@ -72,22 +82,6 @@ def get_currencies_bonbast():
 
 if __name__ == "__main__":
     data = get_currencies_bonbast()
-    
-    # Get the directory where this script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(script_dir, "..", "price_data")
-
-    with open(os.path.join(data_dir, "bonbast_live.json"), "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-    all_data = []
-    historical_file = os.path.join(data_dir, "bonbast_historical.json")
-    if os.path.exists(historical_file):
-        with open(historical_file, "r", encoding="utf-8") as f:
-            try:
-                all_data = json.load(f)
-            except Exception:
-                all_data = []
-    all_data.append(data)
-    with open(historical_file, "w", encoding="utf-8") as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+    write_live("bonbast", data)
+    append_snapshot("bonbast", data)
+    update_aggregates("bonbast", data)
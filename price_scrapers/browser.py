@@ -0,0 +1,255 @@
+"""
+Shared headless Chrome factory for the Selenium scrapers.
+
+The profile skips everything the scrapers do not read (images, fonts,
+stylesheets, media, ads and analytics), uses the "eager" page-load strategy
+and waits for the price table itself instead of sleeping for a fixed time.
+
+Long-running collectors can start a BrowserPool so that repeated scrapes
+borrow warm sessions instead of paying Chrome startup every time.
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:  # only needed to recycle sessions by memory use
+    psutil = None
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+DEFAULT_WAIT = 20
+
+# Pool defaults
+POOL_SIZE = 2
+MAX_USES = 50  # recycle a session after this many scrapes
+MAX_RSS_MB = 1024  # recycle a session whose Chrome processes use more memory than this
+
+# URL patterns dropped before they reach the network
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*yandex.ru*", "*hotjar.com*", "*facebook.net*",
+    "*najva.com*", "*yektanet.com*", "*mediaad.org*",
+]
+
+# Chrome content settings: 2 = block
+BLOCKED_CONTENT = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.fonts": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.managed_default_content_settings.notifications": 2,
+    "profile.managed_default_content_settings.geolocation": 2,
+    "profile.default_content_setting_values.notifications": 2,
+}
+
+
+def create_options():
+    """Chrome options for a minimal headless scraping profile"""
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-default-apps")
+    options.add_argument("--disable-sync")
+    options.add_argument("--mute-audio")
+    options.add_argument("--no-first-run")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", BLOCKED_CONTENT)
+    options.page_load_strategy = "eager"
+    return options
+
+
+def create_driver():
+    """Start a Chrome driver with non-essential resources blocked"""
+    driver = webdriver.Chrome(options=create_options())
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    except Exception:
+        # Blocking by URL is an optimization; the content settings still apply
+        pass
+    return driver
+
+
+def load_page(driver, url, selector, timeout=DEFAULT_WAIT, label=None):
+    """
+    Open a page and wait until the element matching selector exists.
+
+    Returns:
+        float: seconds from navigation until the selector was found
+    """
+    started = time.perf_counter()
+    driver.get(url)
+    WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+    )
+    elapsed = time.perf_counter() - started
+    print(f"{label or url}: page ready in {elapsed:.2f}s")
+    return elapsed
+
+
+class BrowserPool:
+    """
+    Small pool of warm Chrome sessions shared by the scrapers.
+
+    Sessions are health-checked when borrowed, and replaced once they have
+    served max_uses scrapes or the resident memory of their Chrome processes
+    (browser, renderers and helpers started by chromedriver) exceeds
+    max_rss_mb. Memory is read with psutil; without it sessions are only
+    recycled by use count.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES, max_rss_mb=MAX_RSS_MB, factory=create_driver):
+        self.size = size
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        if psutil is None and max_rss_mb:
+            print("psutil is not installed; browser sessions are only recycled by use count")
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self, timeout=None):
+        """Borrow a healthy session, starting a new one if none is idle"""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No browser available in the pool")
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except queue.Empty:
+                    driver = self._factory()
+                    with self._lock:
+                        self._uses[driver] = 0
+                    return driver
+                if self._is_healthy(driver):
+                    return driver
+                self._discard(driver)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, driver):
+        """Return a session, recycling it if it is worn out or too large"""
+        try:
+            with self._lock:
+                uses = self._uses.get(driver, 0) + 1
+                self._uses[driver] = uses
+            if self._closed or uses >= self.max_uses or self._rss_mb(driver) > self.max_rss_mb:
+                self._discard(driver)
+                return
+            try:
+                # Drop the page so an idle session holds as little memory as possible
+                driver.get("about:blank")
+            except Exception:
+                self._discard(driver)
+                return
+            self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        """Context manager that borrows a session and always returns it"""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quit every idle session; borrowed ones are quit when returned"""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def _is_healthy(self, driver):
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _rss_mb(self, driver):
+        """Resident memory of the Chrome processes behind a session, 0 if unknown"""
+        if psutil is None:
+            return 0
+        try:
+            processes = psutil.Process(driver.service.process.pid).children(recursive=True)
+        except (AttributeError, psutil.Error):
+            return 0
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+_pool = None
+
+
+def start_pool(size=POOL_SIZE, max_uses=MAX_USES, max_rss_mb=MAX_RSS_MB):
+    """Enable the process-wide browser pool used by driver_session()"""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool(size, max_uses, max_rss_mb)
+    return _pool
+
+
+def stop_pool():
+    """Shut the process-wide browser pool down"""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+@contextmanager
+def driver_session():
+    """
+    Driver for a single scrape.
+
+    Borrows from the pool when start_pool() has been called, otherwise starts
+    a fresh browser and quits it afterwards.
+    """
+    pool = _pool
+    if pool is not None:
+        with pool.borrow() as driver:
+            yield driver
+        return
+
+    driver = create_driver()
+    try:
+        yield driver
+    finally:
+        driver.quit()
@@ -0,0 +1,238 @@
+"""
+Memory-mapped columnar format for historical price data.
+
+The converter flattens the snapshot history of every source into per-currency
+columns (int64 epoch timestamps, float64 buy/sell, uint8 source id) stored in
+one binary file with a small JSON header index. The loader maps the file and
+hands out NumPy views, so reading history does not parse any JSON.
+
+File layout::
+
+    b"NERKHCOL" | uint32 version | uint32 header length | JSON header | columns
+
+Every column starts on an 8 byte boundary. The header maps each currency to
+the offset and row count of its block; a block holds the four columns back to
+back (timestamp, buy, sell, source).
+
+Usage:
+    python price_scrapers/columnar_store.py [output path]
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.history_store import DATA_DIR, iter_snapshots, legacy_file, list_segments, to_epoch
+
+MAGIC = b"NERKHCOL"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sII")
+ALIGN = 8
+SOURCES = ["alanchand", "bonbast", "tgju"]
+DEFAULT_FILE = "history.npcol"
+
+# (name, dtype) of the columns in every currency block, in file order
+COLUMNS = [
+    ("timestamp", np.dtype("<i8")),
+    ("buy", np.dtype("<f8")),
+    ("sell", np.dtype("<f8")),
+    ("source", np.dtype("u1")),
+]
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _price(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+
+
+def collect_rows(sources=SOURCES, data_dir=None):
+    """
+    Flatten the history of the given sources.
+
+    Returns:
+        dict: currency code -> (timestamps, buys, sells, source ids) lists
+    """
+    rows = {}
+    for source_id, source in enumerate(sources):
+        for snapshot in iter_snapshots(source, data_dir):
+            snapshot_ts = to_epoch(snapshot.get("updated_at"))
+            for code, details in snapshot.get("currencies", {}).items():
+                ts = to_epoch(details.get("timestamp")) or snapshot_ts
+                if ts is None:
+                    continue
+                columns = rows.setdefault(code, ([], [], [], []))
+                columns[0].append(ts)
+                columns[1].append(_price(details.get("buy")))
+                columns[2].append(_price(details.get("sell")))
+                columns[3].append(source_id)
+    return rows
+
+
+def history_fingerprint(sources=SOURCES, data_dir=None):
+    """
+    Size of every history file of the given sources.
+
+    The history is append-only, so the fingerprint changes whenever a
+    snapshot is appended or legacy history is migrated.
+    """
+    fingerprint = {}
+    for source in sources:
+        paths = list_segments(source, data_dir) + [legacy_file(source, data_dir)]
+        fingerprint[source] = {
+            os.path.basename(path): os.path.getsize(path) for path in paths if os.path.exists(path)
+        }
+    return fingerprint
+
+
+def write_columnar(rows, sources, path, fingerprint=None):
+    """
+    Write flattened rows to a columnar file, sorted by time within each currency.
+
+    `fingerprint` (see history_fingerprint()) is stored in the header so
+    readers can tell whether the file still matches the history.
+    """
+    blocks = []
+    for code in sorted(rows):
+        ts, buy, sell, src = rows[code]
+        arrays = [
+            np.asarray(ts, dtype=COLUMNS[0][1]),
+            np.asarray(buy, dtype=COLUMNS[1][1]),
+            np.asarray(sell, dtype=COLUMNS[2][1]),
+            np.asarray(src, dtype=COLUMNS[3][1]),
+        ]
+        order = np.lexsort((arrays[3], arrays[0]))
+        blocks.append((code, [a[order] for a in arrays]))
+
+    # Lay out the blocks first so the header can carry absolute offsets
+    index = {}
+    offset = 0
+    for code, arrays in blocks:
+        index[code] = {"offset": offset, "count": int(len(arrays[0]))}
+        for array in arrays:
+            offset = _align(offset + array.nbytes)
+
+    header = {
+        "sources": list(sources),
+        "columns": [[name, dtype.str] for name, dtype in COLUMNS],
+        "currencies": index,
+        "fingerprint": fingerprint,
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_start = _align(PREAMBLE.size + len(header_bytes))
+    header_bytes = header_bytes.ljust(data_start - PREAMBLE.size, b" ")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for _, arrays in blocks:
+            for array in arrays:
+                f.write(array.tobytes())
+                f.write(b"\0" * (_align(array.nbytes) - array.nbytes))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def convert(sources=SOURCES, path=None, data_dir=None):
+    """Build the columnar file from the segmented history of every source"""
+    path = path or os.path.join(data_dir or DATA_DIR, DEFAULT_FILE)
+    # Taken first, so snapshots appended while converting make the file stale
+    fingerprint = history_fingerprint(sources, data_dir)
+    return write_columnar(collect_rows(sources, data_dir), sources, path, fingerprint)
+
+
+class ColumnarHistory:
+    """
+    Read-only, memory-mapped view of a columnar history file.
+
+    Columns are NumPy arrays backed by the mapping; they stay valid until
+    close() is called.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a columnar history file")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported columnar history version {version}")
+
+        header = json.loads(bytes(self._mmap[PREAMBLE.size:PREAMBLE.size + header_len]))
+        self.sources = header["sources"]
+        self.index = header["currencies"]
+        # None for files written before fingerprints were recorded
+        self.fingerprint = header.get("fingerprint")
+        self._columns = [(name, np.dtype(dtype)) for name, dtype in header["columns"]]
+        self._data_start = PREAMBLE.size + header_len
+        self._cache = {}
+
+    @property
+    def currencies(self):
+        return sorted(self.index)
+
+    def get(self, code):
+        """All columns of a currency as a dict of NumPy views"""
+        if code not in self._cache:
+            entry = self.index[code]
+            count = entry["count"]
+            offset = self._data_start + entry["offset"]
+            columns = {}
+            for name, dtype in self._columns:
+                columns[name] = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+                offset += _align(dtype.itemsize * count)
+            self._cache[code] = columns
+        return self._cache[code]
+
+    def column(self, code, name):
+        """One column ('timestamp', 'buy', 'sell' or 'source') of a currency"""
+        return self.get(code)[name]
+
+    def source_id(self, source):
+        return self.sources.index(source)
+
+    def close(self):
+        self._cache = {}
+        if getattr(self, "_mmap", None) is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Views handed out are still alive; the mapping closes with them
+                pass
+            self._mmap = None
+        if getattr(self, "_file", None) is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load(path=None, data_dir=None):
+    """Open a columnar history file (price_data/history.npcol by default)"""
+    return ColumnarHistory(path or os.path.join(data_dir or DATA_DIR, DEFAULT_FILE))
+
+
+if __name__ == "__main__":
+    output = convert(path=sys.argv[1] if len(sys.argv) > 1 else None)
+    with load(output) as history:
+        total = sum(entry["count"] for entry in history.index.values())
+        print(f"Wrote {output}: {len(history.currencies)} currencies, {total} rows")
@@ -0,0 +1,195 @@
+"""
+Cross-source consensus rates and divergence detection.
+
+Loads the alanchand, bonbast and tgju live snapshots that are younger than
+MAX_INPUT_AGE into aligned
+(currency x source) arrays, computes a median or trimmed-mean consensus for
+buy and sell per currency, flags sources that deviate from it by more than a
+threshold and writes the result to ``price_data/consensus_live.json`` in the
+same shape as the other live files. The consensus is only as fresh as its
+oldest input, so its 'updated_at' (and each currency's 'timestamp') is the
+oldest 'updated_at' of the snapshots it was computed from.
+
+Usage:
+    python price_scrapers/consensus.py [--method median|trimmed] [--threshold 0.03]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.history_store import DATA_DIR, to_epoch, write_live
+
+SOURCES = ["alanchand", "bonbast", "tgju"]
+CONSENSUS_SOURCE = "consensus"
+DEFAULT_THRESHOLD = 0.03  # relative deviation that marks a source as divergent
+MIN_SOURCES = 2  # currencies quoted by fewer sources are left out
+MIN_SOURCES_FOR_DIVERGENCE = 3
+TRIM = 0.2  # fraction cut from each end for the trimmed mean
+MAX_INPUT_AGE = 36 * 60 * 60  # live snapshots older than this are left out (seconds)
+
+
+def load_live(sources=SOURCES, data_dir=None, max_age=MAX_INPUT_AGE, now=None):
+    """
+    Read the live snapshots that exist and are recent enough.
+
+    Snapshots older than `max_age` seconds (or without a readable
+    'updated_at') are skipped; pass max_age=None to keep them all.
+
+    Returns:
+        dict: {source: snapshot}
+    """
+    now = time.time() if now is None else now
+    snapshots = {}
+    for source in sources:
+        path = os.path.join(data_dir or DATA_DIR, f"{source}_live.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {source}: {e}")
+            continue
+        if max_age is not None:
+            updated_at = to_epoch(snapshot.get("updated_at"))
+            if updated_at is None or now - updated_at > max_age:
+                print(f"Skipping {source}: snapshot from {snapshot.get('updated_at')} is older than {max_age}s")
+                continue
+        snapshots[source] = snapshot
+    return snapshots
+
+
+def _oldest(stamps):
+    """The oldest of some ISO timestamps, or None"""
+    dated = [(to_epoch(stamp), stamp) for stamp in stamps if to_epoch(stamp) is not None]
+    return min(dated)[1] if dated else None
+
+
+def align(snapshots):
+    """
+    Align live snapshots into arrays.
+
+    Returns:
+        tuple: (codes, sources, buy, sell) where buy/sell have shape
+        (len(codes), len(sources)) and NaN marks a missing quote
+    """
+    sources = list(snapshots)
+    codes = sorted({code for snap in snapshots.values() for code in snap.get("currencies", {})})
+    row = {code: i for i, code in enumerate(codes)}
+    buy = np.full((len(codes), len(sources)), np.nan)
+    sell = np.full((len(codes), len(sources)), np.nan)
+
+    for j, source in enumerate(sources):
+        for code, details in snapshots[source].get("currencies", {}).items():
+            for target, field in ((buy, "buy"), (sell, "sell")):
+                value = details.get(field)
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+                    target[row[code], j] = value
+    return codes, sources, buy, sell
+
+
+def trimmed_mean(values, trim=TRIM):
+    """Row-wise mean after dropping floor(n * trim) quotes from each end"""
+    ordered = np.sort(values, axis=1)  # NaNs sort last
+    valid = np.sum(~np.isnan(values), axis=1)
+    cut = np.floor(valid * trim).astype(int)
+    positions = np.arange(values.shape[1])
+    keep = (positions >= cut[:, None]) & (positions < (valid - cut)[:, None])
+    total = np.where(keep, ordered, 0.0).sum(axis=1)
+    count = keep.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+def consensus(values, method="median", trim=TRIM):
+    """Row-wise consensus of a (currency x source) array"""
+    if method == "median":
+        result = np.full(values.shape[0], np.nan)
+        has_any = ~np.all(np.isnan(values), axis=1)
+        result[has_any] = np.nanmedian(values[has_any], axis=1)
+        return result
+    if method == "trimmed":
+        return trimmed_mean(values, trim)
+    raise ValueError(f"Unknown consensus method {method!r}")
+
+
+def deviation(values, center):
+    """Relative deviation of every quote from the consensus of its row"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.abs(values - center[:, None]) / center[:, None]
+
+
+def build_consensus(snapshots, method="median", threshold=DEFAULT_THRESHOLD, trim=TRIM):
+    """Compute the consensus snapshot from {source: live snapshot}"""
+    now = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    updated_at = _oldest(snap.get("updated_at") for snap in snapshots.values()) or now
+    codes, sources, buy, sell = align(snapshots)
+
+    buy_center = consensus(buy, method, trim)
+    sell_center = consensus(sell, method, trim)
+    quoted = np.sum(~np.isnan(buy) | ~np.isnan(sell), axis=1)
+    buy_dev = deviation(buy, buy_center)
+    sell_dev = deviation(sell, sell_center)
+    # NaN comparisons are False, so missing quotes are never divergent
+    divergent = (np.fmax(buy_dev, sell_dev) > threshold) & (quoted >= MIN_SOURCES_FOR_DIVERGENCE)[:, None]
+
+    result = {}
+    for i, code in enumerate(codes):
+        if quoted[i] < MIN_SOURCES or np.isnan(buy_center[i]) or np.isnan(sell_center[i]):
+            continue
+        quoting = [s for j, s in enumerate(sources) if not np.isnan(buy[i, j]) or not np.isnan(sell[i, j])]
+        entry = {
+            "buy": round(float(buy_center[i]), 2),
+            "sell": round(float(sell_center[i]), 2),
+            "timestamp": _oldest(snapshots[s].get("updated_at") for s in quoting) or updated_at,
+            "sources": quoting,
+        }
+        flagged = {}
+        for j in np.flatnonzero(divergent[i]):
+            flagged[sources[j]] = {
+                "buy": None if np.isnan(buy[i, j]) else float(buy[i, j]),
+                "sell": None if np.isnan(sell[i, j]) else float(sell[i, j]),
+                "deviation": round(float(np.nanmax([buy_dev[i, j], sell_dev[i, j]])), 4),
+            }
+        if flagged:
+            entry["divergent"] = flagged
+        result[code] = entry
+
+    return {
+        "updated_at": updated_at,
+        "method": method,
+        "threshold": threshold,
+        "inputs": {source: snap.get("updated_at") for source, snap in snapshots.items()},
+        "currencies": result,
+    }
+
+
+def update_consensus(method="median", threshold=DEFAULT_THRESHOLD, data_dir=None):
+    """Rebuild consensus_live.json from the current live files"""
+    data = build_consensus(load_live(data_dir=data_dir), method, threshold)
+    write_live(CONSENSUS_SOURCE, data, data_dir)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build consensus_live.json from all live sources")
+    parser.add_argument("--method", choices=["median", "trimmed"], default="median")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative deviation that marks a source as divergent")
+    args = parser.parse_args()
+
+    data = update_consensus(args.method, args.threshold)
+    print(f"Consensus for {len(data['currencies'])} currencies")
+    for code, entry in data["currencies"].items():
+        for source, info in entry.get("divergent", {}).items():
+            print(f"WARNING: {code}: {source} deviates {info['deviation']:.1%} from consensus")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Offline HTML fixtures for the scrapers.
+
+Fixtures are served by replay_server.py so the scrapers can be exercised and
+benchmarked without network access:
+
+    alanchand.html      https://alanchand.com/currencies-price
+    alanchand_eur.html  https://alanchand.com/currencies-price/eur (fetch_currency.py)
+    tgju.html           https://www.tgju.org/currency
+    bonbast_export.txt  output of ``python -m bonbast export``
+
+``record`` saves the real pages to ``fixtures/recorded/`` (the "Record
+Scraper Fixtures" workflow runs it and commits the result). Only pages the
+scrapers can actually parse are kept, so a markup change on a site shows up
+as a failed recording instead of a silently broken fixture.
+
+``generate`` builds synthetic pages in ``fixtures/synthetic/`` from the
+current ``price_data/*_live.json`` files, using the markup the scrapers
+select on. They are only a fallback for fixtures that have not been
+recorded yet: they can't catch markup changes and parse faster than the
+real pages. read_fixture() always prefers the recorded page.
+
+Usage:
+    python price_scrapers/fixtures.py generate
+    python price_scrapers/fixtures.py record
+"""
+import json
+import os
+import subprocess
+import sys
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.history_store import DATA_DIR
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RECORDED_DIR = os.path.join(FIXTURE_DIR, "recorded")
+SYNTHETIC_DIR = os.path.join(FIXTURE_DIR, "synthetic")
+
+ALANCHAND_FIXTURE = "alanchand.html"
+ALANCHAND_EUR_FIXTURE = "alanchand_eur.html"
+TGJU_FIXTURE = "tgju.html"
+BONBAST_FIXTURE = "bonbast_export.txt"
+
+RECORD_URLS = {
+    ALANCHAND_FIXTURE: "https://alanchand.com/currencies-price",
+    ALANCHAND_EUR_FIXTURE: "https://alanchand.com/currencies-price/eur",
+    TGJU_FIXTURE: "https://www.tgju.org/currency",
+}
+
+# Rows of unrelated markup around the tables, so parsing cost resembles the real pages
+FILLER_ROWS = 200
+
+PERSIAN_DIGITS = str.maketrans("0123456789", "۰۱۲۳۴۵۶۷۸۹")
+
+
+def fixture_kind(name):
+    """'recorded' or 'synthetic', depending on which version of a fixture exists"""
+    return "recorded" if os.path.exists(os.path.join(RECORDED_DIR, name)) else "synthetic"
+
+
+def fixture_path(name):
+    """Path of the recorded fixture, or of the synthetic one if none was recorded"""
+    directory = RECORDED_DIR if fixture_kind(name) == "recorded" else SYNTHETIC_DIR
+    return os.path.join(directory, name)
+
+
+def read_fixture(name):
+    with open(fixture_path(name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _load_live(source):
+    with open(os.path.join(DATA_DIR, f"{source}_live.json"), "r", encoding="utf-8") as f:
+        return json.load(f)["currencies"]
+
+
+def _write(directory, name, text):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    print(f"Wrote {path} ({len(text.encode('utf-8'))} bytes)")
+
+
+def _page(title, body):
+    filler = "\n".join(
+        f'<div class="news-item"><a href="/news/{i}">خبر شماره {i}</a><span class="date">1403/01/{i % 30 + 1:02d}</span></div>'
+        for i in range(FILLER_ROWS)
+    )
+    return (
+        '<!DOCTYPE html>\n<html lang="fa" dir="rtl">\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{title}</title>\n"
+        '<script>window.__NUXT__={"config":{"app":{"baseURL":"/"}}};</script>\n'
+        f"</head>\n<body>\n<header><nav><a href=\"/\">{title}</a></nav></header>\n"
+        f"<main>\n{body}\n</main>\n<aside>\n{filler}\n</aside>\n</body>\n</html>\n"
+    )
+
+
+def _toman(value, persian=False):
+    text = f"{value:,.0f}"
+    return text.translate(PERSIAN_DIGITS) if persian else text
+
+
+def build_alanchand(currencies):
+    """CurrencyTbl page; prices in Persian digits, DIVIDE_100 currencies per 100 units"""
+    from price_scrapers.alanchand import DIVIDE_100
+
+    rows = []
+    for code, details in currencies.items():
+        factor = 100 if code in DIVIDE_100 else 1
+        buy = _toman(details["buy"] * factor, persian=True) if details.get("buy") else ""
+        sell = _toman(details["sell"] * factor, persian=True) if details.get("sell") else ""
+        url = f"https://alanchand.com/currencies-price/{code.lower()}"
+        rows.append(
+            f"<tr onclick=\"window.location='{url}'\">"
+            f'<td class="currName"><img src="/flags/{code.lower()}.svg" alt="{code}"> {code}</td>'
+            f'<td class="buyPrice">{buy}</td>'
+            f'<td class="sellPrice">{sell} <span class="change">+0.1%</span></td>'
+            "</tr>"
+        )
+    # A variant row the scraper skips
+    rows.append(
+        "<tr onclick=\"window.location='https://alanchand.com/currencies-price/usd-hav'\">"
+        '<td class="currName">USD-HAV</td><td class="buyPrice">۱</td><td class="sellPrice">۱</td></tr>'
+    )
+    table = (
+        '<table class="CurrencyTbl"><thead><tr><th>ارز</th><th>خرید</th><th>فروش</th></tr></thead>\n'
+        "<tbody>\n" + "\n".join(rows) + "\n</tbody></table>"
+    )
+    return _page("قیمت ارز", table)
+
+
+def build_alanchand_eur(currencies):
+    """Single-currency page read by fetch_currency.py"""
+    sell = currencies["EUR"]["sell"]
+    table = (
+        '<table class="priceTbl"><tbody>\n'
+        '<tr><td data-v-c1354816="">یورو</td>'
+        f'<td data-v-c1354816="">{_toman(sell)} تومان</td></tr>\n'
+        "</tbody></table>"
+    )
+    return _page("قیمت یورو", table)
+
+
+def build_tgju(currencies):
+    """market-table page; prices in rial, JPY and IQD per 100 units"""
+    from price_scrapers.tgju import PER_100_UNITS, SLUG_TO_CODE
+
+    code_to_slug = {code: slug for slug, code in SLUG_TO_CODE.items()}
+    rows = []
+    for code, details in currencies.items():
+        slug = code_to_slug.get(code)
+        if not slug or not details.get("sell"):
+            continue
+        rial = details["sell"] * 10 * (100 if code in PER_100_UNITS else 1)
+        rows.append(
+            f'<tr data-market-nameslug="{slug}" data-price="{_toman(rial)}">'
+            f'<td class="nf">{_toman(rial)}</td><td class="nf">0.12%</td>'
+            f'<td class="nf">{_toman(rial * 0.99)}</td><td class="nf">{_toman(rial * 1.01)}</td>'
+            '<td>10:00:00</td></tr>'
+        )
+    table = (
+        '<table class="data-table market-table"><thead><tr><th>نام</th><th>قیمت</th></tr></thead>\n'
+        "<tbody>\n" + "\n".join(rows) + "\n</tbody></table>"
+    )
+    return _page("نرخ ارز", table)
+
+
+def build_bonbast_export(currencies):
+    """Python dict repr as printed by the bonbast CLI, with its per-10/100 units"""
+    units = {"AMD": 10, "JPY": 10, "IQD": 100}
+    export = {}
+    for code, details in currencies.items():
+        unit = units.get(code, 1)
+        name = f"{unit} {code}" if unit > 1 else code
+        export[code] = {
+            "name": name,
+            "sell": round(details["sell"] * unit) if details.get("sell") else None,
+            "buy": round(details["buy"] * unit) if details.get("buy") else None,
+        }
+    return repr(export) + "\n"
+
+
+def generate():
+    """Write synthetic fixtures from the current live files"""
+    alanchand = _load_live("alanchand")
+    _write(SYNTHETIC_DIR, ALANCHAND_FIXTURE, build_alanchand(alanchand))
+    _write(SYNTHETIC_DIR, ALANCHAND_EUR_FIXTURE, build_alanchand_eur(alanchand))
+    _write(SYNTHETIC_DIR, TGJU_FIXTURE, build_tgju(_load_live("tgju")))
+    _write(SYNTHETIC_DIR, BONBAST_FIXTURE, build_bonbast_export(_load_live("bonbast")))
+
+
+def parsed_count(name, text):
+    """Number of rates the scrapers read from a fixture (0 means unusable)"""
+    import fetch_currency
+    from price_scrapers import alanchand, bonbast, tgju
+
+    if name == ALANCHAND_FIXTURE:
+        return len(alanchand.normalize_rows(alanchand.extract_rows(text)))
+    if name == ALANCHAND_EUR_FIXTURE:
+        return 1 if fetch_currency.parse_conversion_rate(text) else 0
+    if name == TGJU_FIXTURE:
+        return len(tgju.normalize_rows(tgju.extract_rows(text)))
+    if name == BONBAST_FIXTURE:
+        return len(bonbast.parse_bonbast_export(text, ""))
+    raise ValueError(f"Unknown fixture {name}")
+
+
+def _record(name, text):
+    try:
+        count = parsed_count(name, text)
+    except Exception as e:
+        print(f"Not recording {name}: scraper failed on the page ({e})")
+        return False
+    if not count:
+        print(f"Not recording {name}: scraper found no rates on the page")
+        return False
+    _write(RECORDED_DIR, name, text)
+    return True
+
+
+def record():
+    """
+    Save freshly downloaded pages as the recorded fixtures.
+
+    Returns:
+        bool: True when every fixture was recorded
+    """
+    from price_scrapers.http_engine import fetch_html
+
+    ok = True
+    for name, url in RECORD_URLS.items():
+        try:
+            ok = _record(name, fetch_html(url)) and ok
+        except Exception as e:
+            print(f"Failed to record {url}: {e}")
+            ok = False
+    try:
+        output = subprocess.run(
+            ["python", "-m", "bonbast", "export"],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=60
+        ).stdout
+        ok = _record(BONBAST_FIXTURE, output) and ok
+    except Exception as e:
+        print(f"Failed to record bonbast export: {e}")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "generate":
+        generate()
+    elif command == "record":
+        if not record():
+            sys.exit(1)
+    else:
+        print(__doc__)
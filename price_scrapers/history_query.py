@@ -0,0 +1,196 @@
+"""
+Time-indexed queries over the historical rates in price_data.
+
+HistoryIndex keeps one sorted timestamp array per (source, currency) and
+answers "as of", range and latest-N queries with binary search. It is built
+from the columnar file when one exists (see columnar_store), rebuilding it
+first if the segments have grown since, and from the segmented JSONL history
+otherwise.
+
+Example:
+    index = get_history_index()
+    index.range("bonbast", "EUR", "2025-08-01", "2025-09-01")
+"""
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.columnar_store import (
+    COLUMNS, DEFAULT_FILE, SOURCES, collect_rows, convert, history_fingerprint, load, to_epoch
+)
+from price_scrapers.history_store import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def as_epoch(when):
+    """Accept epoch seconds, a datetime or an ISO date/time string"""
+    if when is None:
+        return None
+    if isinstance(when, (int, float, np.integer, np.floating)):
+        return int(when)
+    if isinstance(when, datetime):
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return int(when.timestamp())
+    epoch = to_epoch(when if "T" in when or " " in when else when + "T00:00:00+00:00")
+    if epoch is None:
+        raise ValueError(f"Invalid timestamp: {when!r}")
+    return epoch
+
+
+class Series:
+    """Time-sorted buy/sell arrays of one currency from one source"""
+
+    __slots__ = ("timestamp", "buy", "sell")
+
+    def __init__(self, timestamp, buy, sell):
+        self.timestamp = timestamp
+        self.buy = buy
+        self.sell = sell
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def slice(self, lo, hi):
+        return Series(self.timestamp[lo:hi], self.buy[lo:hi], self.sell[lo:hi])
+
+    def rows(self):
+        """List of (epoch, buy, sell) tuples"""
+        return list(zip(self.timestamp.tolist(), self.buy.tolist(), self.sell.tolist()))
+
+    def arrays(self):
+        return {"timestamp": self.timestamp, "buy": self.buy, "sell": self.sell}
+
+
+class HistoryIndex:
+    """Sorted per-source, per-currency index over the price history"""
+
+    def __init__(self, sources, columns_by_code):
+        self.sources = list(sources)
+        self._series = {}
+        for code, columns in columns_by_code.items():
+            source_col = columns["source"]
+            for source_id, source in enumerate(self.sources):
+                mask = source_col == source_id
+                if not mask.any():
+                    continue
+                # Rows are sorted by time already, masking keeps that order
+                self._series[(source, code)] = Series(
+                    np.ascontiguousarray(columns["timestamp"][mask]),
+                    np.ascontiguousarray(columns["buy"][mask]),
+                    np.ascontiguousarray(columns["sell"][mask]),
+                )
+
+    @classmethod
+    def from_columnar(cls, path=None, data_dir=None):
+        """Build the index from a columnar history file"""
+        with load(path, data_dir) as history:
+            columns = {code: history.get(code) for code in history.currencies}
+            return cls(history.sources, columns)
+
+    @classmethod
+    def from_history(cls, sources=SOURCES, data_dir=None):
+        """Build the index by reading the segmented JSONL history"""
+        columns = {}
+        for code, (ts, buy, sell, src) in collect_rows(sources, data_dir).items():
+            arrays = {
+                "timestamp": np.asarray(ts, dtype=COLUMNS[0][1]),
+                "buy": np.asarray(buy, dtype=COLUMNS[1][1]),
+                "sell": np.asarray(sell, dtype=COLUMNS[2][1]),
+                "source": np.asarray(src, dtype=COLUMNS[3][1]),
+            }
+            order = np.argsort(arrays["timestamp"], kind="stable")
+            columns[code] = {name: array[order] for name, array in arrays.items()}
+        return cls(sources, columns)
+
+    def keys(self):
+        """Available (source, currency) pairs"""
+        return sorted(self._series)
+
+    def series(self, source, code):
+        """Full Series for a source and currency (empty if unknown)"""
+        empty = np.empty(0)
+        return self._series.get((source, code.upper()), Series(empty.astype("i8"), empty, empty))
+
+    def as_of(self, source, code, when):
+        """
+        Last known rate at or before a point in time.
+
+        Returns:
+            tuple: (epoch, buy, sell) or None if there is no earlier snapshot
+        """
+        series = self.series(source, code)
+        pos = int(np.searchsorted(series.timestamp, as_epoch(when), side="right")) - 1
+        if pos < 0:
+            return None
+        return int(series.timestamp[pos]), float(series.buy[pos]), float(series.sell[pos])
+
+    def range(self, source, code, start=None, end=None, as_arrays=False):
+        """
+        Rates between start (inclusive) and end (exclusive).
+
+        Returns:
+            list of (epoch, buy, sell) tuples, or a dict of NumPy arrays
+            when as_arrays is True
+        """
+        series = self.series(source, code)
+        lo = 0 if start is None else int(np.searchsorted(series.timestamp, as_epoch(start), side="left"))
+        hi = len(series) if end is None else int(np.searchsorted(series.timestamp, as_epoch(end), side="left"))
+        result = series.slice(lo, max(lo, hi))
+        return result.arrays() if as_arrays else result.rows()
+
+    def latest(self, source, code, n=1, as_arrays=False):
+        """The n most recent rates, oldest first"""
+        series = self.series(source, code)
+        result = series.slice(max(0, len(series) - n), len(series))
+        return result.arrays() if as_arrays else result.rows()
+
+
+_history_index = None
+_history_fingerprint = None
+
+
+def _columnar_matches(path, fingerprint):
+    """Whether a columnar file was built from the history as it is now"""
+    try:
+        with load(path) as history:
+            return history.fingerprint == fingerprint
+    except (OSError, ValueError):
+        return False
+
+
+def get_history_index(refresh=False, data_dir=None):
+    """
+    Process-wide HistoryIndex, rebuilt whenever the history changes.
+
+    Prefers price_data/history.npcol and falls back to the JSONL history.
+    The segment sizes recorded in the columnar file are compared with the
+    current ones; a stale file is rebuilt first, and if it can't be written
+    the index is built from the segments directly.
+    """
+    global _history_index, _history_fingerprint
+    fingerprint = history_fingerprint(data_dir=data_dir)
+    if _history_index is not None and not refresh and fingerprint == _history_fingerprint:
+        return _history_index
+
+    columnar_path = os.path.join(data_dir or DATA_DIR, DEFAULT_FILE)
+    index = None
+    if os.path.exists(columnar_path):
+        if not _columnar_matches(columnar_path, fingerprint):
+            try:
+                convert(path=columnar_path, data_dir=data_dir)
+                logger.info(f"Rebuilt stale {columnar_path}")
+            except OSError as e:
+                logger.warning(f"Could not rebuild {columnar_path}: {e}")
+        if _columnar_matches(columnar_path, fingerprint):
+            index = HistoryIndex.from_columnar(columnar_path)
+    _history_index = index or HistoryIndex.from_history(data_dir=data_dir)
+    _history_fingerprint = fingerprint
+    return _history_index
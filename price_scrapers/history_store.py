@@ -0,0 +1,428 @@
+"""
+Append-only, segmented history store for scraped price snapshots.
+
+Each source keeps its history under ``price_data/history/<source>/`` as one
+JSON Lines segment per month (``2025-08.jsonl``). Appending a snapshot writes
+a single line to the current segment, so ingest cost no longer depends on how
+much history has already been collected.
+
+Most scrapes repeat the previous prices, so records are stored as deltas
+against the previous snapshot (only the currencies whose values changed),
+with a full keyframe at the start of every segment and every
+KEYFRAME_INTERVAL records. iter_snapshots() rebuilds full snapshots.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.normpath(os.path.join(SCRIPT_DIR, "..", "price_data"))
+HISTORY_DIRNAME = "history"
+SEGMENT_SUFFIX = ".jsonl"
+STATE_FILE = "_state.json"
+CORRUPT_SUFFIX = ".corrupt"
+KEYFRAME_INTERVAL = 96
+
+
+def history_dir(source, data_dir=None):
+    """Directory holding the segments of a source"""
+    return os.path.join(data_dir or DATA_DIR, HISTORY_DIRNAME, source)
+
+
+def legacy_file(source, data_dir=None):
+    """Path of the old single-file history (``<source>_historical.json``)"""
+    return os.path.join(data_dir or DATA_DIR, f"{source}_historical.json")
+
+
+def segment_key(snapshot):
+    """Segment name (YYYY-MM) a snapshot belongs to, based on its 'updated_at'"""
+    updated_at = snapshot.get("updated_at") or ""
+    if len(updated_at) >= 7 and updated_at[4] == "-":
+        return updated_at[:7]
+    return "unknown"
+
+
+def to_epoch(value):
+    """ISO 8601 timestamp string to integer epoch seconds, or None"""
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return None
+
+
+def list_segments(source, data_dir=None):
+    """Sorted list of segment file paths for a source"""
+    directory = history_dir(source, data_dir)
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory) if n.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, n) for n in names]
+
+
+def _encode(record):
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+    return (line + "\n").encode("utf-8")
+
+
+def _prices(details):
+    """Currency entry without its per-scrape timestamp, for change detection"""
+    return {k: v for k, v in details.items() if k != "timestamp"}
+
+
+def make_record(snapshot, previous):
+    """
+    Encode a snapshot relative to the previous one.
+
+    Returns the snapshot itself (a keyframe) when previous is None, otherwise
+    a delta record holding only the changed and removed currencies.
+    """
+    if previous is None:
+        return snapshot
+
+    updated_at = snapshot.get("updated_at")
+    current = snapshot.get("currencies", {})
+    before = previous.get("currencies", {})
+    changed = {
+        code: details for code, details in current.items()
+        if code not in before or _prices(before[code]) != _prices(details)
+    }
+    removed = [code for code in before if code not in current]
+
+    record = {"kind": "delta", "updated_at": updated_at, "changed": changed}
+    if changed and all(d.get("timestamp") == updated_at for d in changed.values()):
+        # Per-currency timestamps equal updated_at; don't store them twice
+        record["changed"] = {code: _prices(d) for code, d in changed.items()}
+        record["stamped"] = True
+    if removed:
+        record["removed"] = removed
+    return record
+
+
+def apply_record(record, current):
+    """Rebuild the full snapshot a record stands for, given the previous one"""
+    if record.get("kind") != "delta":
+        return record
+    if current is None:
+        return None
+
+    updated_at = record.get("updated_at")
+    removed = set(record.get("removed", ()))
+    currencies = {}
+    for code, details in current.get("currencies", {}).items():
+        if code in removed:
+            continue
+        if "timestamp" in details:
+            details = dict(details, timestamp=updated_at)
+        currencies[code] = details
+    changed = record.get("changed", {})
+    if record.get("stamped"):
+        changed = {code: dict(d, timestamp=updated_at) for code, d in changed.items()}
+    currencies.update(changed)
+    return {"updated_at": updated_at, "currencies": currencies}
+
+
+def _repair_tail(fd):
+    """Drop a partially written last line left behind by an interrupted append"""
+    size = os.lseek(fd, 0, os.SEEK_END)
+    if size == 0:
+        return
+    os.lseek(fd, size - 1, os.SEEK_SET)
+    if os.read(fd, 1) == b"\n":
+        return
+
+    # Walk back to the last complete record and cut everything after it
+    pos = size
+    chunk = 4096
+    while pos > 0:
+        start = max(0, pos - chunk)
+        os.lseek(fd, start, os.SEEK_SET)
+        block = os.read(fd, pos - start)
+        idx = block.rfind(b"\n")
+        if idx != -1:
+            os.ftruncate(fd, start + idx + 1)
+            return
+        pos = start
+    os.ftruncate(fd, 0)
+
+
+def _append_lines(path, payload):
+    """
+    Append encoded records to a segment and fsync before returning.
+
+    Returns:
+        tuple: (segment size before the append, size after it)
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        _repair_tail(fd)
+        before = os.lseek(fd, 0, os.SEEK_END)
+        view = memoryview(payload)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        os.fsync(fd)
+        return before, before + len(payload)
+    finally:
+        os.close(fd)
+
+
+def append_record(path, record):
+    """
+    Durably append one JSON record to a JSONL file.
+
+    Returns:
+        int: file size after the append
+    """
+    _, size = _append_lines(path, _encode(record))
+    return size
+
+
+def _load_state(source, data_dir=None):
+    path = os.path.join(history_dir(source, data_dir), STATE_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(source, state, data_dir=None):
+    path = os.path.join(history_dir(source, data_dir), STATE_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _segment_snapshots(path):
+    """Full snapshots stored in one segment (each segment starts with a keyframe)"""
+    current = None
+    for record in iter_segment(path):
+        current = apply_record(record, current)
+        if current is not None:
+            yield current
+
+
+def _write_segment(path, key, snapshots):
+    """
+    Atomically (re)write a segment from full snapshots.
+
+    Returns:
+        dict: the append state describing the written segment
+    """
+    tmp_path = path + ".tmp"
+    previous = None
+    since_keyframe = 0
+    with open(tmp_path, "wb") as f:
+        for snapshot in snapshots:
+            if since_keyframe >= KEYFRAME_INTERVAL:
+                previous = None
+            record = make_record(snapshot, previous)
+            since_keyframe = 0 if record is snapshot else since_keyframe + 1
+            previous = snapshot
+            f.write(_encode(record))
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return {"segment": key, "size": size, "since_keyframe": since_keyframe, "last": previous}
+
+
+def migrate_legacy(source, data_dir=None):
+    """
+    Merge ``<source>_historical.json`` into delta-encoded monthly segments.
+
+    Snapshots are merged with whatever a segment already holds, in
+    timestamp order; a snapshot whose 'updated_at' is already stored is
+    skipped, so a legacy file written again after the first migration (or an
+    interrupted migration being re-run) never loses segmented history. The
+    old file is only removed once every segment has been written and synced.
+
+    A legacy file that can't be parsed is renamed to
+    ``<source>_historical.json.corrupt`` and left for manual recovery, so
+    appends can continue without losing it.
+
+    Returns:
+        int: number of migrated snapshots
+    """
+    path = legacy_file(source, data_dir)
+    if not os.path.exists(path):
+        return 0
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshots = json.load(f)
+    except ValueError as e:
+        corrupt_path = path + CORRUPT_SUFFIX
+        os.replace(path, corrupt_path)
+        logger.error(f"Could not parse {path} ({e}); moved it to {corrupt_path}")
+        return 0
+    if not isinstance(snapshots, list):
+        snapshots = [snapshots]
+
+    grouped = {}
+    for snapshot in snapshots:
+        grouped.setdefault(segment_key(snapshot), []).append(snapshot)
+
+    directory = history_dir(source, data_dir)
+    os.makedirs(directory, exist_ok=True)
+    migrated = 0
+    written = {}
+    for key, items in grouped.items():
+        final_path = os.path.join(directory, key + SEGMENT_SUFFIX)
+        merged = list(_segment_snapshots(final_path)) if os.path.exists(final_path) else []
+        stored = {snapshot.get("updated_at") for snapshot in merged}
+        for snapshot in items:
+            if snapshot.get("updated_at") in stored:
+                continue
+            stored.add(snapshot.get("updated_at"))
+            merged.append(snapshot)
+            migrated += 1
+        # Stable sort keeps the stored order of snapshots sharing a timestamp
+        merged.sort(key=lambda snapshot: to_epoch(snapshot.get("updated_at")) or 0)
+        written[key] = _write_segment(final_path, key, merged)
+
+    # The append state only ever describes the newest segment
+    segments = list_segments(source, data_dir)
+    latest = os.path.basename(segments[-1])[:-len(SEGMENT_SUFFIX)] if segments else None
+    if latest in written:
+        _save_state(source, written[latest], data_dir)
+    os.remove(path)
+    return migrated
+
+
+def append_snapshot(source, snapshot, data_dir=None):
+    """
+    Append one snapshot to the history of a source.
+
+    The snapshot is stored as a delta against the last stored one unless a
+    keyframe is due. If the source still has an old ``<source>_historical.json``
+    it is migrated into segments first.
+    """
+    if os.path.exists(legacy_file(source, data_dir)):
+        migrate_legacy(source, data_dir)
+
+    directory = history_dir(source, data_dir)
+    os.makedirs(directory, exist_ok=True)
+    key = segment_key(snapshot)
+    path = os.path.join(directory, key + SEGMENT_SUFFIX)
+
+    state = _load_state(source, data_dir)
+    previous = None
+    since_keyframe = 0
+    if (
+        state
+        and state.get("segment") == key
+        and state.get("since_keyframe", KEYFRAME_INTERVAL) < KEYFRAME_INTERVAL
+        and os.path.exists(path)
+        and os.path.getsize(path) == state.get("size")
+    ):
+        # The state only describes the segment if nothing was appended after it
+        previous = state.get("last")
+        since_keyframe = state["since_keyframe"]
+
+    record = make_record(snapshot, previous)
+    since_keyframe = 0 if record is snapshot else since_keyframe + 1
+    size = append_record(path, record)
+    _save_state(source, {
+        "segment": key,
+        "size": size,
+        "since_keyframe": since_keyframe,
+        "last": snapshot,
+    }, data_dir)
+    return path
+
+
+def iter_segment(path):
+    """Yield the raw records stored in one segment, skipping a torn last line"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def iter_records(source, data_dir=None, start=None, end=None):
+    """
+    Lazily iterate the stored records (keyframes and deltas) of a source.
+
+    Args:
+        source (str): Source name, e.g. "alanchand"
+        data_dir (str): Override for the price_data directory
+        start (str): Optional first segment to read (YYYY-MM), inclusive
+        end (str): Optional last segment to read (YYYY-MM), inclusive
+    """
+    # Not yet migrated history is read first; it is normally older than the segments
+    path = legacy_file(source, data_dir)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                legacy = json.load(f)
+            except Exception:
+                legacy = []
+        for snapshot in legacy if isinstance(legacy, list) else [legacy]:
+            key = segment_key(snapshot)
+            if (start and key < start) or (end and key > end):
+                continue
+            yield snapshot
+
+    for segment in list_segments(source, data_dir):
+        key = os.path.basename(segment)[:-len(SEGMENT_SUFFIX)]
+        if (start and key < start) or (end and key > end):
+            continue
+        yield from iter_segment(segment)
+
+
+def iter_snapshots(source, data_dir=None, start=None, end=None):
+    """
+    Lazily iterate the full snapshots of a source in chronological order.
+
+    Takes the same arguments as iter_records() and rebuilds delta records
+    into complete snapshots on the fly.
+
+    Yields:
+        dict: snapshots with 'updated_at' and 'currencies'
+    """
+    current = None
+    for record in iter_records(source, data_dir, start, end):
+        current = apply_record(record, current)
+        if current is not None:
+            yield current
+
+
+def write_live(source, snapshot, data_dir=None):
+    """Atomically replace ``<source>_live.json`` with the latest snapshot"""
+    path = os.path.join(data_dir or DATA_DIR, f"{source}_live.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    import sys
+
+    sources = sys.argv[2:] or ["alanchand", "bonbast", "tgju"]
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate":
+        for name in sources:
+            print(f"{name}: migrated {migrate_legacy(name)} snapshots")
+    else:
+        for name in sources:
+            count = sum(1 for _ in iter_snapshots(name))
+            print(f"{name}: {count} snapshots in {len(list_segments(name))} segments")
@@ -0,0 +1,60 @@
+"""
+Plain HTTP fetching and HTML parsing shared by the scrapers.
+
+The price tables on alanchand and tgju are rendered server side, so they can
+be read without starting a browser. Scrapers try this engine first and only
+fall back to Selenium when the static page does not contain the table.
+"""
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4 import FeatureNotFound
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "fa-IR,fa;q=0.9,en;q=0.8",
+}
+DEFAULT_TIMEOUT = 10
+
+_session = None
+
+
+def get_session():
+    """Shared requests session so repeated fetches reuse connections"""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.headers.update(HEADERS)
+    return _session
+
+
+def fetch_html(url, timeout=DEFAULT_TIMEOUT):
+    """Download a page and return its decoded HTML"""
+    resp = get_session().get(url, timeout=timeout)
+    resp.raise_for_status()
+    if not resp.encoding or resp.encoding.lower() == "iso-8859-1":
+        resp.encoding = "utf-8"
+    return resp.text
+
+
+def parse_tables(html):
+    """
+    Parse only the <table> elements of a page.
+
+    Uses lxml when it is installed and the built-in parser otherwise.
+    """
+    strainer = SoupStrainer("table")
+    try:
+        return BeautifulSoup(html, "lxml", parse_only=strainer)
+    except FeatureNotFound:
+        return BeautifulSoup(html, "html.parser", parse_only=strainer)
+
+
+def cell_text(cell):
+    """Visible text of a cell, whitespace collapsed like Selenium's .text"""
+    if cell is None:
+        return ""
+    return cell.get_text(" ", strip=True)
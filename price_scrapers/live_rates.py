@@ -0,0 +1,187 @@
+"""
+In-memory index of the live rate files.
+
+Loads ``price_data/<source>_live.json`` and the EUR series in
+``exchange_rate.json`` once and keeps their quotes in memory. Before every
+use a file is only stat()ed; it is parsed again when its mtime or size
+changed, so lookups need neither network access nor JSON parsing while the
+scrapers aren't writing.
+
+The files are replaced atomically (write_live() and fetch_currency.py write a
+temporary file and rename it), so a reader never sees a half-written
+snapshot. A file that still fails to parse is logged and skipped until it
+changes again.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.history_store import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Tried in order; consensus first as it is the median of the others
+LIVE_SOURCES = ["consensus", "bonbast", "tgju", "alanchand"]
+EXCHANGE_RATE_SOURCE = "exchange_rate"
+EXCHANGE_RATE_FILE = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "exchange_rate.json"
+))
+# fetch_currency.py writes exchange_rate.json timestamps in CET
+CET = timezone(timedelta(hours=1))
+
+
+def parse_exchange_timestamp(value):
+    """Parse the mixed timestamp formats found in exchange_rate.json"""
+    value = value.replace(" CET", "").strip()
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=CET)
+    return int(parsed.timestamp())
+
+
+def _positive(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+
+def parse_live_file(data):
+    """(updated_at epoch, {code: {"buy", "sell"}}) of a live snapshot"""
+    updated_at = datetime.fromisoformat(data["updated_at"]).timestamp()
+    rates = {}
+    for code, quote in data.get("currencies", {}).items():
+        buy, sell = quote.get("buy"), quote.get("sell")
+        if _positive(buy) or _positive(sell):
+            rates[code] = {"buy": buy, "sell": sell}
+    return updated_at, rates
+
+
+def parse_exchange_rate_file(entries):
+    """(updated_at epoch, {"EUR": quote}) from the last entry of exchange_rate.json"""
+    if isinstance(entries, dict):
+        entries = [entries]
+    for entry in reversed(entries):
+        stamp = entry.get("timestamp") or entry.get("last_updated")
+        rate = entry.get("rate")
+        if stamp and _positive(rate):
+            return parse_exchange_timestamp(stamp), {"EUR": {"buy": rate, "sell": rate}}
+    raise ValueError("exchange_rate.json has no usable entry")
+
+
+class LiveRateIndex:
+    """Quotes of the live files, reloaded only when a file changes on disk"""
+
+    def __init__(self, data_dir=None, sources=LIVE_SOURCES, exchange_rate_file=EXCHANGE_RATE_FILE):
+        data_dir = data_dir or DATA_DIR
+        self.files = {source: os.path.join(data_dir, f"{source}_live.json") for source in sources}
+        if exchange_rate_file:
+            self.files[EXCHANGE_RATE_SOURCE] = exchange_rate_file
+        self.sources = list(self.files)
+        # source -> (stamp, updated_at, rates); stamp is (mtime_ns, size) or None if missing
+        self._entries = {}
+        self._merged = {}
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, source, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if source == EXCHANGE_RATE_SOURCE:
+            return parse_exchange_rate_file(data)
+        return parse_live_file(data)
+
+    def entry(self, source):
+        """(updated_at, rates) of a source, or None if its file is missing or unreadable"""
+        path = self.files[source]
+        stamp = self._stamp(path)
+        cached = self._entries.get(source)
+        if cached and cached[0] == stamp:
+            return cached[1:] if cached[2] is not None else None
+        with self._lock:
+            cached = self._entries.get(source)
+            if cached and cached[0] == stamp:
+                return cached[1:] if cached[2] is not None else None
+            updated_at, rates = None, None
+            if stamp is not None:
+                try:
+                    updated_at, rates = self._load(source, path)
+                except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                    logger.warning(f"Skipping live rate file {path}: {e}")
+                self.reloads += 1
+            self._entries[source] = (stamp, updated_at, rates)
+        return (updated_at, rates) if rates is not None else None
+
+    def _usable(self, sources, max_age):
+        now = time.time()
+        usable = []
+        for source in sources:
+            entry = self.entry(source)
+            if entry and (max_age is None or now - entry[0] <= max_age):
+                usable.append(source)
+        return usable
+
+    def rates(self, sources=None, max_age=None):
+        """
+        Quotes of all usable sources merged, earlier sources taking precedence.
+
+        Sources whose snapshot is older than `max_age` seconds are skipped.
+        The merged dict is cached until one of its files changes; don't
+        modify it.
+        """
+        usable = self._usable(sources or self.sources, max_age)
+        key = tuple((source, self._entries[source][0]) for source in usable)
+        cached = self._merged.get(tuple(usable))
+        if cached and cached[0] == key:
+            return cached[1]
+        merged = {}
+        for source in reversed(usable):
+            merged.update(self._entries[source][2])
+        self._merged[tuple(usable)] = (key, merged)
+        return merged
+
+    def quote(self, code, sources=None, max_age=None):
+        """(source, quote) from the first usable source quoting `code`, or None"""
+        for source in self._usable(sources or self.sources, max_age):
+            quote = self._entries[source][2].get(code)
+            if quote:
+                return source, quote
+        return None
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_live_index(data_dir=None):
+    """Process-wide LiveRateIndex of a data directory"""
+    key = os.path.abspath(data_dir or DATA_DIR)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(key, LiveRateIndex(key))
+    return index
+
+
+if __name__ == "__main__":
+    index = get_live_index()
+    for source in index.sources:
+        entry = index.entry(source)
+        if entry is None:
+            print(f"{source:<14}missing")
+            continue
+        updated_at, rates = entry
+        age = (time.time() - updated_at) / 3600
+        print(f"{source:<14}{len(rates):>4} currencies, {age:8.1f} h old")
@@ -0,0 +1,104 @@
+"""
+Local stand-in for the scraped sites, serving the recorded fixtures.
+
+Routes mirror the real URL paths, so a scraper only needs its base URL
+swapped:
+
+    /currencies-price       alanchand.html
+    /currencies-price/eur   alanchand_eur.html
+    /currency               tgju.html
+    /bonbast/export         bonbast_export.txt
+
+Every response is delayed by ``--latency`` seconds to imitate a slow origin.
+
+Usage:
+    python price_scrapers/replay_server.py [--port 8765] [--latency 0.2]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.fixtures import (
+    ALANCHAND_EUR_FIXTURE,
+    ALANCHAND_FIXTURE,
+    BONBAST_FIXTURE,
+    TGJU_FIXTURE,
+    read_fixture,
+)
+
+ROUTES = {
+    "/currencies-price": (ALANCHAND_FIXTURE, "text/html; charset=utf-8"),
+    "/currencies-price/eur": (ALANCHAND_EUR_FIXTURE, "text/html; charset=utf-8"),
+    "/currency": (TGJU_FIXTURE, "text/html; charset=utf-8"),
+    "/bonbast/export": (BONBAST_FIXTURE, "text/plain; charset=utf-8"),
+}
+
+
+def make_handler(latency=0.0):
+    """Request handler class serving ROUTES after `latency` seconds"""
+    cache = {}
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0].rstrip("/") or "/"
+            route = ROUTES.get(path)
+            if latency:
+                time.sleep(latency)
+            if route is None:
+                self.send_error(404)
+                return
+            name, content_type = route
+            if name not in cache:
+                cache[name] = read_fixture(name).encode("utf-8")
+            body = cache[name]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+
+def start_server(latency=0.0, port=0, host="127.0.0.1"):
+    """
+    Serve the fixtures from a background thread.
+
+    Returns:
+        tuple: (server, base URL); call server.shutdown() when done
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(latency))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the scraper fixtures locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.latency))
+    print(f"Serving fixtures on http://{args.host}:{args.port} (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Vectorized OHLC resampling of irregular price snapshots.
+
+Turns the snapshots of a source/currency (or the EUR rate series in
+exchange_rate.json) into fixed-interval bars with open/high/low/close of the
+chosen price, the number of snapshots in the bar and the mean and last
+sell-buy spread. Everything is computed with NumPy reductions over the whole
+series; there are no Python loops over snapshots.
+
+Example:
+    bars = resample_source("bonbast", "EUR", "1d")
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.history_query import get_history_index
+from price_scrapers.live_rates import EXCHANGE_RATE_FILE, parse_exchange_timestamp
+
+INTERVALS = {
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "4h": 4 * 60 * 60,
+    "1d": 24 * 60 * 60,
+    "1w": 7 * 24 * 60 * 60,
+}
+
+BAR_FIELDS = ["time", "open", "high", "low", "close", "count", "spread_mean", "spread_last"]
+
+
+def _step(interval):
+    if isinstance(interval, str):
+        try:
+            return INTERVALS[interval]
+        except KeyError:
+            raise ValueError(f"Unknown interval {interval!r}, expected one of {sorted(INTERVALS)}")
+    return int(interval)
+
+
+def _empty_bars():
+    bars = {name: np.empty(0) for name in BAR_FIELDS}
+    bars["time"] = bars["time"].astype("i8")
+    bars["count"] = bars["count"].astype("i8")
+    return bars
+
+
+def resample(timestamp, buy, sell, interval, price="buy"):
+    """
+    Resample one time-sorted series into fixed bars.
+
+    Args:
+        timestamp: int64 epoch seconds, sorted ascending
+        buy, sell: float64 arrays of the same length (NaN for missing)
+        interval: "5m", "1h", "1d", ... or a bar size in seconds
+        price: "buy", "sell" or "mid"; the price the OHLC columns describe
+
+    Returns:
+        dict of NumPy arrays, one entry per bar, keyed by BAR_FIELDS;
+        'time' is the bar start in epoch seconds. Empty bars are omitted.
+    """
+    step = _step(interval)
+    timestamp = np.asarray(timestamp, dtype="i8")
+    buy = np.asarray(buy, dtype="f8")
+    sell = np.asarray(sell, dtype="f8")
+
+    if price == "buy":
+        values = buy
+    elif price == "sell":
+        values = sell
+    elif price == "mid":
+        values = (buy + sell) / 2
+    else:
+        raise ValueError(f"Unknown price {price!r}")
+
+    valid = np.isfinite(values) & (values > 0)
+    if not valid.any():
+        return _empty_bars()
+    timestamp, values = timestamp[valid], values[valid]
+    spread = (sell - buy)[valid]
+
+    buckets = timestamp // step * step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(values)]
+    counts = ends - starts
+
+    # NaN spreads (one side missing) don't count towards the mean
+    spread_ok = np.isfinite(spread)
+    spread_sum = np.add.reduceat(np.where(spread_ok, spread, 0.0), starts)
+    spread_n = np.add.reduceat(spread_ok.astype("i8"), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spread_mean = np.where(spread_n > 0, spread_sum / np.maximum(spread_n, 1), np.nan)
+
+    return {
+        "time": buckets[starts],
+        "open": values[starts],
+        "high": np.maximum.reduceat(values, starts),
+        "low": np.minimum.reduceat(values, starts),
+        "close": values[ends - 1],
+        "count": counts.astype("i8"),
+        "spread_mean": spread_mean,
+        "spread_last": spread[ends - 1],
+    }
+
+
+def resample_source(source, code, interval, price="buy", start=None, end=None, index=None):
+    """Bars for one currency of one scraped source (alanchand, bonbast, tgju)"""
+    index = index or get_history_index()
+    series = index.range(source, code, start, end, as_arrays=True)
+    return resample(series["timestamp"], series["buy"], series["sell"], interval, price)
+
+
+def load_exchange_rate(path=EXCHANGE_RATE_FILE):
+    """
+    Read the EUR->IRT series written by fetch_currency.py.
+
+    Returns:
+        tuple: (timestamps, rates) NumPy arrays sorted by time
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if isinstance(entries, dict):
+        entries = [entries]
+
+    timestamps = []
+    rates = []
+    for entry in entries:
+        stamp = entry.get("timestamp") or entry.get("last_updated")
+        rate = entry.get("rate")
+        if not stamp or not isinstance(rate, (int, float)):
+            continue
+        try:
+            timestamps.append(parse_exchange_timestamp(stamp))
+        except ValueError:
+            continue
+        rates.append(float(rate))
+
+    timestamps = np.asarray(timestamps, dtype="i8")
+    rates = np.asarray(rates, dtype="f8")
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], rates[order]
+
+
+def resample_exchange_rate(interval, path=EXCHANGE_RATE_FILE):
+    """Bars for the single EUR rate in exchange_rate.json (spread is always 0)"""
+    timestamps, rates = load_exchange_rate(path)
+    return resample(timestamps, rates, rates, interval)
+
+
+def to_rows(bars):
+    """Bars as a list of dicts, e.g. for JSON responses"""
+    columns = [bars[name].tolist() for name in BAR_FIELDS]
+    return [dict(zip(BAR_FIELDS, values)) for values in zip(*columns)]
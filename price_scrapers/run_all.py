@@ -0,0 +1,163 @@
+"""
+Run every price scraper concurrently and write all live files in one pass.
+
+HTTP collectors run on their own thread pool (they use blocking
+requests/subprocess calls), browser collectors run on a small bounded worker
+pool, and every source has its own timeout. The timeout is passed down to the
+requests and subprocess calls, and neither pool is waited for once the
+results are in, so a hung source can't hold up the refresh. A full refresh
+therefore takes as long as the slowest source instead of the sum of all of
+them.
+
+Usage:
+    python price_scrapers/run_all.py [--sources alanchand tgju] [--timeout 30]
+    python price_scrapers/run_all.py --interval 60   # keep collecting with warm browsers
+"""
+import argparse
+import asyncio
+import functools
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers import alanchand, bonbast, tgju
+from price_scrapers.aggregates import update_aggregates
+from price_scrapers.browser import start_pool, stop_pool
+from price_scrapers.consensus import update_consensus
+from price_scrapers.history_store import append_snapshot, write_live
+
+# name -> (HTTP collector, browser collector or None)
+SOURCES = {
+    "alanchand": (alanchand.get_currency_prices_http, alanchand.get_currency_prices_selenium),
+    "bonbast": (bonbast.get_currencies_bonbast, None),
+    "tgju": (tgju.get_tgju_rates_http, tgju.get_tgju_rates_selenium),
+}
+
+HTTP_TIMEOUT = 20
+BROWSER_TIMEOUT = 60
+MAX_BROWSERS = 2
+MIN_CURRENCIES = 3
+
+
+def _is_valid(data):
+    return bool(data) and len(data.get("currencies", {})) >= MIN_CURRENCIES
+
+
+async def collect(name, http_pool, browser_pool, http_timeout=HTTP_TIMEOUT, browser_timeout=BROWSER_TIMEOUT):
+    """
+    Collect one source: HTTP first, then the browser pool if that fails.
+
+    Returns:
+        tuple: (name, snapshot or None, engine used or error message)
+    """
+    http_fn, browser_fn = SOURCES[name]
+    loop = asyncio.get_running_loop()
+
+    try:
+        future = loop.run_in_executor(http_pool, functools.partial(http_fn, timeout=http_timeout))
+        data = await asyncio.wait_for(future, http_timeout)
+        if _is_valid(data):
+            return name, data, "http"
+        reason = "too few currencies"
+    except asyncio.TimeoutError:
+        reason = f"timed out after {http_timeout}s"
+    except Exception as e:
+        reason = str(e)
+
+    if browser_fn is None:
+        return name, None, reason
+
+    print(f"{name}: HTTP collector failed ({reason}), using browser")
+    try:
+        future = loop.run_in_executor(browser_pool, browser_fn)
+        data = await asyncio.wait_for(future, browser_timeout)
+        if _is_valid(data):
+            return name, data, "browser"
+        return name, None, "browser returned too few currencies"
+    except asyncio.TimeoutError:
+        return name, None, f"browser timed out after {browser_timeout}s"
+    except Exception as e:
+        return name, None, str(e)
+
+
+async def run_all(names=None, http_timeout=HTTP_TIMEOUT, browser_timeout=BROWSER_TIMEOUT,
+                  max_browsers=MAX_BROWSERS):
+    """Run the given sources concurrently and return {name: (snapshot, status)}"""
+    names = names or list(SOURCES)
+    http_pool = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="http")
+    browser_pool = ThreadPoolExecutor(max_workers=max_browsers, thread_name_prefix="browser")
+    try:
+        results = await asyncio.gather(*(
+            collect(name, http_pool, browser_pool, http_timeout, browser_timeout) for name in names
+        ))
+    finally:
+        # Don't let a timed-out collector hold up the other results
+        http_pool.shutdown(wait=False, cancel_futures=True)
+        browser_pool.shutdown(wait=False, cancel_futures=True)
+    return {name: (data, status) for name, data, status in results}
+
+
+def save_results(results):
+    """Write live files, history and aggregates for every successful source"""
+    for name, (data, _) in results.items():
+        if data is None:
+            continue
+        write_live(name, data)
+        append_snapshot(name, data)
+        update_aggregates(name, data)
+
+
+def refresh(args):
+    """Run one full refresh; returns True when every source succeeded"""
+    started = time.perf_counter()
+    results = asyncio.run(run_all(args.sources, args.timeout, args.browser_timeout, args.max_browsers))
+    save_results(results)
+    if any(data is not None for data, _ in results.values()):
+        update_consensus()
+
+    ok = True
+    for name, (data, status) in results.items():
+        if data is None:
+            ok = False
+            print(f"ERROR: {name}: {status}")
+        else:
+            print(f"SUCCESS: {name}: {len(data['currencies'])} currencies via {status}")
+    print(f"Finished in {time.perf_counter() - started:.2f}s")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all price scrapers concurrently")
+    parser.add_argument("--sources", nargs="+", choices=list(SOURCES), default=list(SOURCES))
+    parser.add_argument("--timeout", type=float, default=HTTP_TIMEOUT,
+                        help="per-source timeout for HTTP collectors (seconds)")
+    parser.add_argument("--browser-timeout", type=float, default=BROWSER_TIMEOUT,
+                        help="per-source timeout for browser collectors (seconds)")
+    parser.add_argument("--max-browsers", type=int, default=MAX_BROWSERS)
+    parser.add_argument("--interval", type=float, default=0,
+                        help="keep refreshing every N seconds, reusing warm browsers")
+    args = parser.parse_args()
+
+    if not args.interval:
+        if not refresh(args):
+            sys.exit(1)
+        return
+
+    start_pool(size=args.max_browsers)
+    try:
+        while True:
+            started = time.monotonic()
+            refresh(args)
+            time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        print("Collector stopped by user")
+    finally:
+        stop_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+A consensus built from old live files must not look fresh.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from price_scrapers import consensus
+from price_scrapers.live_rates import LiveRateIndex
+
+DAY = 24 * 60 * 60
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(microsecond=0).isoformat()
+
+
+def _snapshot(epoch, eur):
+    stamp = _iso(epoch)
+    return {
+        "updated_at": stamp,
+        "currencies": {
+            code: {"buy": price, "sell": price + 100, "timestamp": stamp}
+            for code, price in (("EUR", eur), ("USD", 90000), ("GBP", 110000))
+        },
+    }
+
+
+class ConsensusAgeTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        self.now = time.time()
+
+    def _write(self, source, snapshot):
+        with open(os.path.join(self.data_dir, f"{source}_live.json"), "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+
+    def test_stale_inputs_are_left_out(self):
+        for source in consensus.SOURCES:
+            self._write(source, _snapshot(self.now - 57 * DAY, 100000))
+
+        data = consensus.update_consensus(data_dir=self.data_dir)
+
+        self.assertEqual(data["currencies"], {})
+        index = LiveRateIndex(self.data_dir, sources=["consensus"], exchange_rate_file=None)
+        self.assertIsNone(index.quote("EUR", max_age=consensus.MAX_INPUT_AGE))
+
+    def test_updated_at_is_oldest_input(self):
+        self._write("alanchand", _snapshot(self.now - 3600, 100000))
+        self._write("bonbast", _snapshot(self.now - 600, 101000))
+        self._write("tgju", _snapshot(self.now - 57 * DAY, 50000))
+
+        data = consensus.update_consensus(data_dir=self.data_dir)
+
+        self.assertEqual(data["updated_at"], _iso(self.now - 3600))
+        self.assertEqual(sorted(data["inputs"]), ["alanchand", "bonbast"])
+        self.assertEqual(data["currencies"]["EUR"]["timestamp"], _iso(self.now - 3600))
+        self.assertEqual(data["currencies"]["EUR"]["buy"], 100500)
+
+
+if __name__ == "__main__":
+    unittest.main()
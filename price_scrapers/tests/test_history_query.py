@@ -0,0 +1,47 @@
+"""
+get_history_index() must fall back to the JSONL history, and log rather
+than print, when a stale columnar file can't be rebuilt.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from price_scrapers import history_query, history_store
+from price_scrapers.columnar_store import DEFAULT_FILE, convert
+
+
+def _snapshot(day, price):
+    stamp = f"2026-10-{day:02d}T00:00:00+00:00"
+    return {"updated_at": stamp, "currencies": {"USD": {"buy": price, "sell": price + 1, "timestamp": stamp}}}
+
+
+class GetHistoryIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        history_store.append_snapshot("bonbast", _snapshot(1, 100), self.data_dir)
+        convert(path=os.path.join(self.data_dir, DEFAULT_FILE), data_dir=self.data_dir)
+        history_store.append_snapshot("bonbast", _snapshot(2, 200), self.data_dir)
+
+    def test_stale_file_is_rebuilt(self):
+        with self.assertLogs(history_query.logger, "INFO") as logs:
+            index = history_query.get_history_index(refresh=True, data_dir=self.data_dir)
+        self.assertIn("Rebuilt stale", logs.output[0])
+        self.assertEqual(len(index.range("bonbast", "USD")), 2)
+
+    def test_failed_rebuild_is_logged(self):
+        with mock.patch.object(history_query, "convert", side_effect=OSError("read-only")):
+            with self.assertLogs(history_query.logger, "WARNING") as logs:
+                index = history_query.get_history_index(refresh=True, data_dir=self.data_dir)
+        self.assertIn("read-only", logs.output[0])
+        self.assertEqual(len(index.range("bonbast", "USD")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Migrating a legacy ``<source>_historical.json`` must never lose history.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from price_scrapers import history_store
+
+
+def _snapshot(day, price):
+    stamp = f"2026-10-{day:02d}T00:00:00+00:00"
+    return {"updated_at": stamp, "currencies": {"USD": {"buy": price, "sell": price + 1, "timestamp": stamp}}}
+
+
+class MigrateLegacyTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        self.legacy = history_store.legacy_file("bonbast", self.data_dir)
+
+    def _write_legacy(self, text):
+        with open(self.legacy, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def _days(self):
+        return [s["updated_at"][8:10] for s in history_store.iter_snapshots("bonbast", self.data_dir)]
+
+    def test_empty_legacy_without_segments(self):
+        self._write_legacy("[]")
+
+        self.assertEqual(history_store.migrate_legacy("bonbast", self.data_dir), 0)
+        self.assertFalse(os.path.exists(self.legacy))
+        history_store.append_snapshot("bonbast", _snapshot(1, 100), self.data_dir)
+        self.assertEqual(self._days(), ["01"])
+
+    def test_corrupt_legacy_without_segments(self):
+        self._write_legacy('[{"updated_at": ')
+
+        self.assertEqual(history_store.migrate_legacy("bonbast", self.data_dir), 0)
+        self.assertFalse(os.path.exists(self.legacy))
+        self.assertTrue(os.path.exists(self.legacy + history_store.CORRUPT_SUFFIX))
+        history_store.append_snapshot("bonbast", _snapshot(1, 100), self.data_dir)
+        self.assertEqual(self._days(), ["01"])
+
+    def test_corrupt_legacy_with_segments_is_kept(self):
+        for day in (1, 2):
+            history_store.append_snapshot("bonbast", _snapshot(day, 100 + day), self.data_dir)
+        self._write_legacy("not json")
+
+        history_store.append_snapshot("bonbast", _snapshot(3, 103), self.data_dir)
+
+        self.assertEqual(self._days(), ["01", "02", "03"])
+        with open(self.legacy + history_store.CORRUPT_SUFFIX, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "not json")
+
+    def test_reappearing_legacy_is_merged(self):
+        for day in (1, 2, 3, 4, 5):
+            history_store.append_snapshot("bonbast", _snapshot(day, 100 + day), self.data_dir)
+        self._write_legacy(json.dumps([_snapshot(3, 103), _snapshot(8, 200)]))
+
+        history_store.append_snapshot("bonbast", _snapshot(9, 300), self.data_dir)
+
+        self.assertEqual(self._days(), ["01", "02", "03", "04", "05", "08", "09"])
+
+
+if __name__ == "__main__":
+    unittest.main()
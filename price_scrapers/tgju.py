@@ -1,10 +1,35 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 from datetime import datetime, timezone
-import json
-import time
 import os
+import sys
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_scrapers.aggregates import update_aggregates
+from price_scrapers.history_store import append_snapshot, write_live
+from price_scrapers.http_engine import DEFAULT_TIMEOUT, fetch_html, parse_tables, cell_text
+
+URL = "https://www.tgju.org/currency"
+TABLE_ROW_SELECTOR = "table.data-table.market-table tbody tr"
+# Fewer rows than this means the static page did not contain the table
+MIN_CURRENCIES = 3
+
+# Reads every market-table row with at least two cells as [slug, first cell text, data-price]
+EXTRACT_ROWS_JS = """
+var out = [];
+document.querySelectorAll("table.data-table.market-table tbody tr").forEach(function (row) {
+    var tds = row.getElementsByTagName("td");
+    if (tds.length < 2) {
+        return;
+    }
+    out.push([
+        row.getAttribute("data-market-nameslug") || "",
+        tds[0].innerText || "",
+        row.getAttribute("data-price") || ""
+    ]);
+});
+return out;
+"""
 
 SLUG_TO_CODE = {
     "price_dollar_rl": "USD",
@@ -37,67 +62,96 @@ SLUG_TO_CODE = {
     "price_qar": "QAR"
 }
 
+# Quoted per 100 units, like on alanchand and bonbast
+PER_100_UNITS = ["JPY", "IQD"]
+
 def parse_price(price_str, code):
     price = float(price_str.replace(',', '').replace('٬',''))
     price = price / 10
-    if code == "JPY":
+    if code in PER_100_UNITS:
         price = price / 100
     return round(price, 2)
 
-def get_tgju_rates():
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-gpu")
-    driver = webdriver.Chrome(options=options)
-    driver.get("https://www.tgju.org/currency")
-    time.sleep(2)
+def normalize_row(slug, first_cell_text, data_price):
+    """
+    Normalize the raw values of one market-table row
 
-    result = {}
-    now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    Returns:
+        tuple: (code, price) or None if the row should be skipped
+    """
+    if slug not in SLUG_TO_CODE:
+        return None
+    code = SLUG_TO_CODE[slug]
+    price_str = first_cell_text.strip() if first_cell_text and first_cell_text.strip() else data_price
+    if not price_str:
+        return None
+    return code, parse_price(price_str, code)
 
-    rows = driver.find_elements(By.CSS_SELECTOR, "table.data-table.market-table tbody tr")
-    for row in rows:
-        slug = row.get_attribute("data-market-nameslug")
-        if slug not in SLUG_TO_CODE:
-            continue
-        code = SLUG_TO_CODE[slug]
-        tds = row.find_elements(By.TAG_NAME, "td")
-        if len(tds) < 2:
-            continue
-        price_str = tds[0].text.strip() if tds[0].text.strip() else row.get_attribute("data-price")
-        if not price_str:
-            continue
-        price = parse_price(price_str, code)
+def build_result(rows, now):
+    """Build the live snapshot from normalized (code, price) rows"""
+    result = {}
+    for code, price in rows:
         result[code] = {
             "buy": price,
             "sell": price,
             "timestamp": now
         }
-    driver.quit()
     return {
         "updated_at": now,
         "currencies": result
     }
 
+def extract_rows(html):
+    """Raw [slug, first cell text, data-price] rows from the static page HTML"""
+    soup = parse_tables(html)
+    raw_rows = []
+    for row in soup.select(TABLE_ROW_SELECTOR):
+        tds = row.find_all("td")
+        if len(tds) < 2:
+            continue
+        raw_rows.append([row.get("data-market-nameslug"), cell_text(tds[0]), row.get("data-price")])
+    return raw_rows
+
+def normalize_rows(raw_rows):
+    """Normalize raw rows from either engine, dropping the ones to skip"""
+    rows = []
+    for slug, first_cell_text, data_price in raw_rows:
+        normalized = normalize_row(slug, first_cell_text, data_price)
+        if normalized:
+            rows.append(normalized)
+    return rows
+
+def get_tgju_rates_http(url=URL, timeout=DEFAULT_TIMEOUT):
+    """Read the market table from the static HTML without a browser"""
+    html = fetch_html(url, timeout)
+    now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    return build_result(normalize_rows(extract_rows(html)), now)
+
+def get_tgju_rates_selenium(url=URL):
+    # Imported here so the HTTP path works without selenium installed
+    from price_scrapers.browser import driver_session, load_page
+
+    with driver_session() as driver:
+        load_page(driver, url, TABLE_ROW_SELECTOR, label="tgju")
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        # One script round-trip returns [slug, first cell text, data-price] for every row
+        raw_rows = driver.execute_script(EXTRACT_ROWS_JS) or []
+
+    return build_result(normalize_rows(raw_rows), now)
+
+def get_tgju_rates():
+    """Scrape over plain HTTP, falling back to Selenium if the table is missing"""
+    try:
+        data = get_tgju_rates_http()
+        if len(data["currencies"]) >= MIN_CURRENCIES:
+            return data
+        print("Static tgju page has no market table, falling back to Selenium")
+    except Exception as e:
+        print(f"HTTP scrape of tgju failed ({e}), falling back to Selenium")
+    return get_tgju_rates_selenium()
+
 if __name__ == "__main__":
     data = get_tgju_rates()
-    
-    # Get the directory where this script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(script_dir, "..", "price_data")
-
-    with open(os.path.join(data_dir, "tgju_live.json"), "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-    all_data = []
-    historical_file = os.path.join(data_dir, "tgju_historical.json")
-    if os.path.exists(historical_file):
-        with open(historical_file, "r", encoding="utf-8") as f:
-            try:
-                all_data = json.load(f)
-            except Exception:
-                all_data = []
-    all_data.append(data)
-    with open(historical_file, "w", encoding="utf-8") as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+    write_live("tgju", data)
+    append_snapshot("tgju", data)
+    update_aggregates("tgju", data)
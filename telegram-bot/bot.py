@@ -23,7 +23,7 @@ from telegram.ext import (
 from config.settings import TOKEN
 
 # Import utilities
-from src.utils.bot_setup import setup_logging, post_init
+from src.utils.bot_setup import setup_logging, post_init, post_shutdown
 
 # Import handlers
 from src.handlers.commands import start_command, convert_command, help_command, default_command
@@ -46,7 +46,7 @@ def main() -> None:
         sys.exit(1)
     
     # Build application
-    app = ApplicationBuilder().token(TOKEN).post_init(post_init).build()
+    app = ApplicationBuilder().token(TOKEN).post_init(post_init).post_shutdown(post_shutdown).build()
 
     # Register command handlers
     app.add_handler(CommandHandler("start", start_command))
@@ -12,6 +12,7 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
 # Currency configuration
 MAX_CURRENCIES = 18
+MAX_BATCH_AMOUNTS = 10  # amounts converted from one message
 
 # Logging configuration
 LOG_LEVEL = "INFO"
@@ -21,6 +22,26 @@ LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 BONBAST_URL = "https://www.bonbast.com/"
 EXCHANGE_RATE_API_URL = "https://api.exchangerate-api.com/v4/latest/"
 
+# Rate cache configuration (seconds)
+RATE_CACHE_TTL = 300  # rates older than this are fetched again on use
+RATE_REFRESH_INTERVAL = 240  # background refresh period, shorter than the TTL
+RATE_STALE_LIMIT = 3600  # expired rates younger than this are served while refreshing
+CONVERSION_LATENCY_BUDGET = 0.5  # max time a conversion waits for upstream fetches when stale rates exist
+COLD_FETCH_TIMEOUT = 15  # max time a conversion waits when nothing usable is cached
+CIRCUIT_FAILURE_THRESHOLD = 3  # consecutive failures that open a provider's circuit
+CIRCUIT_RESET_TIMEOUT = 60  # time an open circuit waits before letting a trial call through
+
+# Secondary IRT sources
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PRICE_DATA_DIR = os.getenv("PRICE_DATA_DIR", os.path.join(REPO_ROOT, "price_data"))
+IRT_HEDGE_DELAY = 0.15  # seconds Bonbast gets before secondary sources are raced
+LIVE_FILE_MAX_AGE = 36 * 3600  # scraped live files older than this are ignored
+
+# Rate cache persisted across restarts
+RATE_CACHE_FILE = os.getenv(
+    "RATE_CACHE_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "rate_cache.json")
+)
+
 # Bot messages
 WELCOME_MESSAGE = """🏦 **Welcome to What Da Nerkh Bot!**
 
@@ -63,6 +84,7 @@ Send any message in Persian or English containing currency amounts and I'll auto
 
 � **Number Shortcut:**
 Just send a number (like "45") and I'll convert it using your default pair, or EUR → IRT if not set!
+Send several numbers (like "10 50 100") to convert them all in one reply.
 
 �💰 **Supported currencies include:**
 IRT, USD, EUR, GBP, TRY, AED, CAD, AUD, CHF, JPY, CNY, RUB, SAR, INR, KWD, QAR, OMR, BHD and more!
@@ -8,15 +8,63 @@ from telegram.ext import ContextTypes
 from config.settings import (
     ERROR_NO_SESSION, ERROR_INVALID_NUMBER, ERROR_POSITIVE_NUMBER,
     CONVERTING_MESSAGE, ERROR_NETWORK, ERROR_GENERAL,
-    LLM_PROCESSING_MESSAGE, LLM_NO_CURRENCY_DETECTED, LLM_ERROR_MESSAGE
+    LLM_PROCESSING_MESSAGE, LLM_NO_CURRENCY_DETECTED, LLM_ERROR_MESSAGE,
+    MAX_BATCH_AMOUNTS
 )
 from src.utils.keyboards import create_convert_again_keyboard
 from src.utils.session import get_user_session, has_valid_session
-from src.utils.keyboards import validate_amount, format_conversion_result
-from src.utils.currency_converter import convert_currency_with_rate, get_currency_name
+from src.utils.keyboards import validate_amount, validate_amounts, format_conversion_result, format_batch_result
+from src.utils.currency_converter import (
+    convert_currency_with_rate_async, convert_batch_async, get_currency_name
+)
 from src.utils.llm_parser import get_llm_parser
 from src.utils.persistent_storage import get_user_default_pair
 
+def get_quick_pair(user_id: int) -> tuple[str, str, str]:
+    """User's default pair, or EUR → IRT, with a note for the reply"""
+    default_pair = get_user_default_pair(user_id)
+    if default_pair:
+        from_currency = default_pair["from"]
+        to_currency = default_pair["to"]
+        conversion_note = f"_Using your default pair: {from_currency} → {to_currency}_"
+    else:
+        from_currency = "EUR"
+        to_currency = "IRT"
+        conversion_note = f"_Default conversion: {from_currency} → {to_currency}_\n💡 _Set your preferred pair with /default_"
+    return from_currency, to_currency, conversion_note
+
+
+async def reply_with_batch(update: Update, amounts: list, from_currency: str, to_currency: str, note: str = "") -> None:
+    """Convert several amounts at once and reply with a single table"""
+    converting_msg = await update.message.reply_text(CONVERTING_MESSAGE)
+    keyboard = create_convert_again_keyboard()
+
+    try:
+        batch = await convert_batch_async(amounts, from_currency, [to_currency])
+        
+        if batch["rates"][to_currency]:
+            response_text = format_batch_result(batch, get_currency_name)
+            if note:
+                response_text += f"\n\n💡 {note}"
+            
+            await converting_msg.edit_text(
+                response_text,
+                reply_markup=keyboard,
+                parse_mode='Markdown'
+            )
+        else:
+            await converting_msg.edit_text(
+                ERROR_NETWORK,
+                reply_markup=keyboard
+            )
+    except Exception as e:
+        logging.error(f"Error in batch conversion: {e}")
+        await converting_msg.edit_text(
+            ERROR_GENERAL,
+            reply_markup=keyboard
+        )
+
+
 async def handle_amount_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle amount input from user"""
     user_id = update.message.from_user.id
@@ -31,6 +79,15 @@ async def handle_amount_message(update: Update, context: ContextTypes.DEFAULT_TY
     to_currency = session["to"]
     amount_text = update.message.text
 
+    # Several amounts are converted together in one reply
+    is_batch, amounts, batch_error = validate_amounts(amount_text, MAX_BATCH_AMOUNTS)
+    if is_batch:
+        await reply_with_batch(update, amounts, from_currency, to_currency)
+        return
+    if batch_error:
+        await update.message.reply_text(batch_error)
+        return
+
     # Validate amount input
     is_valid, amount, error_msg = validate_amount(amount_text)
     if not is_valid:
@@ -42,7 +99,7 @@ async def handle_amount_message(update: Update, context: ContextTypes.DEFAULT_TY
 
     try:
         # Perform currency conversion
-        result, conversion_rate = convert_currency_with_rate(amount, from_currency, to_currency)
+        result, conversion_rate = await convert_currency_with_rate_async(amount, from_currency, to_currency)
         
         if result and conversion_rate:
             from_name = get_currency_name(from_currency)
@@ -83,7 +140,7 @@ async def handle_general_message(update: Update, context: ContextTypes.DEFAULT_T
     
     Processing priority:
     1. Check if user has an active session for amount input
-    2. Check if message is a simple number for default pair conversion
+    2. Check if message is one or more numbers for default pair conversion
     3. Try LLM analysis for natural language currency detection
     4. Show help message if no intent detected
     """
@@ -99,33 +156,32 @@ async def handle_general_message(update: Update, context: ContextTypes.DEFAULT_T
         await handle_llm_processing(update, context, force_llm=True)
         return
 
+    is_valid, amount, error_msg = validate_amount(message_text)
+    is_batch, amounts, batch_error = validate_amounts(message_text, MAX_BATCH_AMOUNTS)
+
     # Priority 1: Check if user has an active session for amount input
     if has_valid_session(user_id):
-        is_valid, amount, error_msg = validate_amount(message_text)
-        if is_valid:
+        if is_valid or is_batch:
             await handle_amount_message(update, context)
             return
 
-    # Priority 2: Check if message is a simple number without active session
-    is_valid, amount, error_msg = validate_amount(message_text)
+    # Priority 2: Check if message is one or more numbers without active session
+    if is_batch:
+        from_currency, to_currency, conversion_note = get_quick_pair(user_id)
+        logging.info(f"Batch number conversion triggered - User: {user_id}, Amounts: {len(amounts)} {from_currency} → {to_currency}")
+        await reply_with_batch(update, amounts, from_currency, to_currency, conversion_note)
+        return
+
     if is_valid:
         # Get user's default pair or use EUR → IRT as fallback
-        default_pair = get_user_default_pair(user_id)
-        if default_pair:
-            from_currency = default_pair["from"]
-            to_currency = default_pair["to"]
-            conversion_note = f"_Using your default pair: {from_currency} → {to_currency}_"
-        else:
-            from_currency = "EUR"
-            to_currency = "IRT"
-            conversion_note = f"_Default conversion: {from_currency} → {to_currency}_\n💡 _Set your preferred pair with /default_"
+        from_currency, to_currency, conversion_note = get_quick_pair(user_id)
         
         logging.info(f"Number conversion triggered - User: {user_id}, Amount: {amount} {from_currency} → {to_currency}")
         
         converting_msg = await update.message.reply_text("🔄 Converting...")
         
         try:
-            result, conversion_rate = convert_currency_with_rate(amount, from_currency, to_currency)
+            result, conversion_rate = await convert_currency_with_rate_async(amount, from_currency, to_currency)
             
             if result and conversion_rate:
                 from_name = get_currency_name(from_currency)
@@ -198,7 +254,7 @@ async def handle_llm_processing(update: Update, context: ContextTypes.DEFAULT_TY
                 await processing_msg.edit_text("🔄 Converting...")
                 
                 try:
-                    result, conversion_rate = convert_currency_with_rate(
+                    result, conversion_rate = await convert_currency_with_rate_async(
                         intent.amount, intent.from_currency, to_currency
                     )
                     
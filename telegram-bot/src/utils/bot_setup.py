@@ -6,6 +6,10 @@ import os
 from telegram import BotCommand
 from telegram.ext import Application
 from src.utils.llm_parser import get_llm_parser
+from src.utils.currency_converter import (
+    start_rate_refresher, stop_rate_refresher, get_bonbast_provider, close_http_session,
+    load_rate_cache, save_rate_cache
+)
 
 def setup_logging(log_level: str = "INFO") -> None:
     """Setup logging configuration"""
@@ -27,6 +31,11 @@ async def setup_bot_commands(app: Application) -> None:
 async def post_init(app: Application) -> None:
     """Called after the bot is initialized"""
     await setup_bot_commands(app)
+
+    # Keep exchange rates in memory, refreshed independently of user traffic;
+    # rates saved before the last shutdown serve the first conversions
+    load_rate_cache()
+    start_rate_refresher()
     
     # Check LLM parser availability
     llm_parser = get_llm_parser()
@@ -43,3 +52,11 @@ async def post_init(app: Application) -> None:
     else:
         logging.warning("⚠️ LLM parser not available - Missing OPENROUTER_API_KEY")
         logging.info("ℹ️ Bot will work in basic mode without smart message processing")
+
+
+async def post_shutdown(app: Application) -> None:
+    """Called after the bot has shut down"""
+    await stop_rate_refresher()
+    save_rate_cache()
+    get_bonbast_provider().close()
+    await close_http_session()
@@ -1,7 +1,23 @@
+import aiohttp
+import numpy as np
 import requests
 import subprocess
 import json
 import logging
+import asyncio
+import importlib
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from config.settings import (
+    RATE_CACHE_TTL, RATE_REFRESH_INTERVAL, RATE_STALE_LIMIT, CONVERSION_LATENCY_BUDGET,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT, COLD_FETCH_TIMEOUT, REPO_ROOT, PRICE_DATA_DIR, IRT_HEDGE_DELAY,
+    LIVE_FILE_MAX_AGE, RATE_CACHE_FILE
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -38,8 +54,129 @@ CURRENCIES = [
     {"code": "NOK", "name": "Norwegian Krone (NOK)"},
 ]
 
-def get_bonbast_rates():
-    """Get live exchange rates from Bonbast for Iranian Toman"""
+class SingleFlight:
+    """
+    Coalesces concurrent async calls that share a key.
+
+    The first caller starts the call; everyone arriving while it is in flight
+    awaits the same task and gets the same result, so upstream sees one
+    request per key however many handlers ask at once.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    def in_flight(self, key):
+        return key in self._inflight
+
+    async def do(self, key, fn):
+        """Run `fn()` for `key` unless a call for it is already in flight"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # A cancelled waiter must not cancel the fetch the others are sharing
+        return await asyncio.shield(task)
+
+# Global coalescing layer for upstream fetches
+_single_flight = SingleFlight()
+
+def get_single_flight():
+    """Get the process-wide single-flight group"""
+    return _single_flight
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after repeated failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused immediately. Once `reset_timeout` has passed it goes
+    half-open: exactly one trial call is let through, which closes the
+    circuit if it succeeds and opens it again if it fails. A trial whose
+    result is never recorded stops blocking other calls after another
+    `reset_timeout`.
+    """
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        # When the half-open trial call was let through, None if none is running
+        self.trial_started_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go upstream now"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.time()
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            if self.trial_started_at is not None and now - self.trial_started_at < self.reset_timeout:
+                return False
+            self.trial_started_at = now
+            logger.info(f"Circuit for {self.name} half-open, letting one trial call through")
+            return True
+
+    def record(self, success):
+        with self._lock:
+            if success:
+                if self.opened_at is not None:
+                    logger.info(f"Circuit for {self.name} closed")
+                self.failures = 0
+                self.opened_at = None
+                self.trial_started_at = None
+                return
+            self.failures += 1
+            if self.trial_started_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+                self.opened_at = time.time()
+                self.trial_started_at = None
+
+# Circuit breakers per provider
+_circuit_breakers = {}
+
+def get_circuit_breaker(name):
+    """Get or create the circuit breaker of a provider"""
+    if name not in _circuit_breakers:
+        _circuit_breakers[name] = CircuitBreaker(name)
+    return _circuit_breakers[name]
+
+# Bonbast quotes these currencies per 10 or 100 units
+BONBAST_UNITS = {"AMD": 10, "JPY": 10, "IQD": 100}
+
+def ingest_bonbast_quote(code, buy, sell, name="", quantity=None):
+    """Normalize one Bonbast quote to a per-unit rate (done once, when rates are fetched)"""
+    unit = quantity or BONBAST_UNITS.get(code, 1)
+    if unit != 1:
+        if sell: sell = sell / unit
+        if buy: buy = buy / unit
+    return {
+        "buy": buy,
+        "sell": sell,
+        "name": name
+    }
+
+def parse_bonbast_export(output):
+    """Per-unit rates from the JSON printed by `python -m bonbast export`"""
+    bonbast_data = json.loads(output.strip())
+    processed_rates = {}
+    for code, currency_data in bonbast_data.items():
+        if code not in BONBAST_CURRENCIES:
+            continue
+        processed_rates[code] = ingest_bonbast_quote(
+            code, currency_data.get('buy'), currency_data.get('sell'), currency_data.get('name', '')
+        )
+    logger.info(f"Successfully fetched Bonbast rates for {len(processed_rates)} currencies")
+    return processed_rates
+
+def fetch_bonbast_rates_subprocess():
+    """Fetch Bonbast rates by running `python -m bonbast export` (for bonbast versions without a client API)"""
     try:
         # Run bonbast command and parse output
         process_result = subprocess.run(
@@ -50,38 +187,7 @@ def get_bonbast_rates():
             timeout=10
         )
         
-        # Parse the JSON output
-        bonbast_data = json.loads(process_result.stdout.strip())
-        
-        # Process currency data and apply corrections
-        processed_rates = {}
-        
-        for code, currency_data in bonbast_data.items():
-            if code not in BONBAST_CURRENCIES:
-                continue
-                
-            sell = currency_data.get('sell')
-            buy = currency_data.get('buy')
-            
-            # Apply price corrections for certain currencies
-            if code == "AMD":  # Armenian Dram (shown as "10 Armenian Dram")
-                if sell: sell = sell / 10
-                if buy: buy = buy / 10
-            elif code == "JPY":  # Japanese Yen (shown as "10 Japanese Yen")
-                if sell: sell = sell / 10
-                if buy: buy = buy / 10
-            elif code == "IQD":  # Iraqi Dinar (shown as "100 Iraqi Dinar")
-                if sell: sell = sell / 100
-                if buy: buy = buy / 100
-
-            processed_rates[code] = {
-                "buy": buy,
-                "sell": sell,
-                "name": currency_data.get('name', '')
-            }
-            
-        logger.info(f"Successfully fetched Bonbast rates for {len(processed_rates)} currencies")
-        return processed_rates
+        return parse_bonbast_export(process_result.stdout)
         
     except subprocess.TimeoutExpired:
         logger.error("Bonbast command timed out")
@@ -96,9 +202,304 @@ def get_bonbast_rates():
         logger.error(f"Error getting bonbast data: {e}")
         return {}
 
-def get_bonbast_rate(from_code, to_code):
-    """Get exchange rate between IRT and another currency using Bonbast"""
-    bonbast_rates = get_bonbast_rates()
+async def fetch_bonbast_rates_subprocess_async():
+    """Async version of fetch_bonbast_rates_subprocess()"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "python", "-m", "bonbast", "export",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=10)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            logger.error("Bonbast command timed out")
+            return {}
+        if process.returncode != 0:
+            logger.error(f"Bonbast command failed: {stderr.decode(errors='replace').strip()}")
+            return {}
+        return parse_bonbast_export(stdout.decode())
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse Bonbast JSON output: {e}")
+        return {}
+    except Exception as e:
+        logger.error(f"Error getting bonbast data: {e}")
+        return {}
+
+class BonbastProvider:
+    """
+    Fetches Bonbast rates in-process through the bonbast library.
+
+    A single BonbastClient is kept for the life of the process, so its HTTP
+    session and access token are reused between refreshes. BonbastClient
+    ships with bonbast 2.0 (the version requirements.txt pins); an older
+    install falls back to the export subprocess with a warning.
+    """
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            try:
+                from bonbast import BonbastClient
+            except ImportError:
+                logger.warning("Installed bonbast has no BonbastClient (needs bonbast>=2.0.0), using the export subprocess")
+                return None
+            self._client = BonbastClient(timeout=self.timeout)
+        return self._client
+
+    def fetch(self):
+        """Current per-unit Bonbast rates keyed by currency code, or {} on failure"""
+        with self._lock:
+            client = self._get_client()
+            if client is None:
+                return fetch_bonbast_rates_subprocess()
+            try:
+                prices = client.prices()
+            except Exception as e:
+                logger.error(f"Error getting bonbast data: {e}")
+                return {}
+
+        processed_rates = {}
+        for currency in prices.currencies:
+            if currency.code not in BONBAST_CURRENCIES:
+                continue
+            processed_rates[currency.code] = ingest_bonbast_quote(
+                currency.code, currency.buy, currency.sell, currency.name,
+                getattr(currency, "quantity", None)
+            )
+        logger.info(f"Successfully fetched Bonbast rates for {len(processed_rates)} currencies")
+        return processed_rates
+
+    async def fetch_async(self):
+        """Like fetch(), without blocking the event loop"""
+        if self._get_client() is None:
+            return await fetch_bonbast_rates_subprocess_async()
+        # The bonbast client is synchronous; run it on a worker thread
+        return await asyncio.get_running_loop().run_in_executor(None, self.fetch)
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+# Global provider instance
+_bonbast_provider = None
+
+def get_bonbast_provider():
+    """Get or create the process-wide Bonbast provider"""
+    global _bonbast_provider
+    if _bonbast_provider is None:
+        _bonbast_provider = BonbastProvider()
+    return _bonbast_provider
+
+def fetch_bonbast_rates():
+    """Fetch live exchange rates from Bonbast for Iranian Toman"""
+    breaker = get_circuit_breaker("bonbast")
+    if not breaker.allow():
+        logger.warning("Bonbast circuit is open, skipping fetch")
+        return {}
+    rates = get_bonbast_provider().fetch()
+    breaker.record(bool(rates))
+    return rates
+
+async def fetch_bonbast_rates_async():
+    """Fetch live Bonbast rates without blocking the event loop"""
+    breaker = get_circuit_breaker("bonbast")
+    if not breaker.allow():
+        logger.warning("Bonbast circuit is open, skipping fetch")
+        return {}
+    rates = await get_bonbast_provider().fetch_async()
+    breaker.record(bool(rates))
+    return rates
+
+class RateSnapshot:
+    """
+    Process-wide snapshot of upstream rates with a TTL.
+
+    A background task keeps it fresh so conversions read rates from memory;
+    a conversion only fetches by itself when the snapshot has expired
+    (e.g. the refresher is not running yet). Expired rates younger than
+    `stale_limit` are still served while a refresh runs.
+    """
+
+    def __init__(self, ttl=RATE_CACHE_TTL, stale_limit=RATE_STALE_LIMIT):
+        self.ttl = ttl
+        self.stale_limit = stale_limit
+        self.bonbast = {}
+        self.fetched_at = 0.0
+        # IRT rates from the source that won the last hedged lookup
+        self.secondary = None
+        self._refresh_lock = threading.Lock()
+
+    def age(self):
+        """Seconds since the last successful refresh"""
+        return time.time() - self.fetched_at
+
+    def is_fresh(self):
+        return bool(self.bonbast) and self.age() < self.ttl
+
+    def is_usable(self):
+        """Fresh, or expired but still within the staleness limit"""
+        return bool(self.bonbast) and self.age() < self.stale_limit
+
+    def _store(self, rates):
+        if not rates:
+            return False
+        self.bonbast = rates
+        self.fetched_at = time.time()
+        return True
+
+    def refresh(self):
+        """Fetch new rates; the old snapshot is kept if the fetch fails"""
+        started = self.fetched_at
+        with self._refresh_lock:
+            # Another thread refreshed while we waited for the lock
+            if self.fetched_at != started and self.is_fresh():
+                return True
+            return self._store(fetch_bonbast_rates())
+
+    async def refresh_async(self):
+        """Async version of refresh(); concurrent calls share one fetch"""
+        rates = await get_single_flight().do("bonbast", fetch_bonbast_rates_async)
+        return self._store(rates)
+
+    def refresh_in_background(self):
+        """Start an async refresh unless one is already in flight"""
+        if not get_single_flight().in_flight("bonbast"):
+            asyncio.ensure_future(self.refresh_async())
+
+    async def ensure_fresh_async(self):
+        """
+        Make sure usable rates are cached, without blocking the event loop.
+
+        Stale rates are served as they are while a refresh runs in the
+        background; only an empty or too old snapshot is awaited.
+        """
+        if self.is_fresh():
+            return True
+        if self.is_usable():
+            self.refresh_in_background()
+            return True
+        await self.refresh_async()
+        return self.is_usable()
+
+    def get_bonbast_rates(self, fetch=True):
+        """Cached Bonbast rates, refreshed first if they have expired and fetch is set"""
+        if fetch and not self.is_fresh():
+            self.refresh()
+        return self.bonbast if self.is_usable() else {}
+
+    def store_secondary(self, source, rates):
+        """Keep the IRT rates of a secondary source that won a hedged lookup"""
+        self.secondary = {"source": source, "rates": rates, "fetched_at": time.time()}
+
+    def get_irt_rates(self, fetch=True):
+        """Bonbast rates, with currencies it lacks filled in from the last hedged winner"""
+        rates = self.get_bonbast_rates(fetch)
+        secondary = self.secondary
+        if not secondary or time.time() - secondary["fetched_at"] >= self.stale_limit:
+            return rates
+        merged = dict(secondary["rates"])
+        merged.update(rates)
+        return merged
+
+    def has_fresh_quote(self, code):
+        """Whether Bonbast or a recent hedged winner quotes `code` within the TTL"""
+        if self.is_fresh() and _valid_quote(self.bonbast.get(code)):
+            return True
+        secondary = self.secondary
+        return bool(secondary) and time.time() - secondary["fetched_at"] < self.ttl and \
+            _valid_quote(secondary["rates"].get(code))
+
+    def version(self):
+        """Changes whenever the IRT rates returned by get_irt_rates() may have changed"""
+        return (self.fetched_at, self.secondary["fetched_at"] if self.secondary else None)
+
+    def dump(self):
+        """JSON-serializable copy of the snapshot, for save_rate_cache()"""
+        return {"bonbast": self.bonbast, "fetched_at": self.fetched_at, "secondary": self.secondary}
+
+    def restore(self, data):
+        """
+        Seed the snapshot from dump() output, keeping the original fetch times.
+
+        Rates past the staleness limit are dropped, and rates newer than
+        the persisted ones are never replaced.
+        """
+        now = time.time()
+        fetched_at = data.get("fetched_at") or 0.0
+        if data.get("bonbast") and now - fetched_at < self.stale_limit and fetched_at > self.fetched_at:
+            self.bonbast = data["bonbast"]
+            self.fetched_at = fetched_at
+        secondary = data.get("secondary")
+        if secondary and now - secondary["fetched_at"] < self.stale_limit and \
+                (not self.secondary or secondary["fetched_at"] > self.secondary["fetched_at"]):
+            self.secondary = secondary
+
+# Global snapshot instance
+_rate_snapshot = None
+_refresh_task = None
+
+def get_rate_snapshot():
+    """Get or create the process-wide rate snapshot"""
+    global _rate_snapshot
+    if _rate_snapshot is None:
+        _rate_snapshot = RateSnapshot()
+    return _rate_snapshot
+
+async def refresh_rates_periodically(interval=RATE_REFRESH_INTERVAL):
+    """Refresh the rate snapshot every `interval` seconds, off the event loop"""
+    snapshot = get_rate_snapshot()
+    # Rates restored from the rate cache are only refreshed once they are due
+    if snapshot.is_fresh():
+        await asyncio.sleep(max(0, interval - snapshot.age()))
+    while True:
+        try:
+            if await snapshot.refresh_async():
+                logger.info("Rate snapshot refreshed")
+                await asyncio.get_running_loop().run_in_executor(None, save_rate_cache)
+            else:
+                logger.warning("Rate snapshot refresh failed, keeping previous rates")
+        except Exception as e:
+            logger.error(f"Error refreshing rate snapshot: {e}")
+        await asyncio.sleep(interval)
+
+def start_rate_refresher(interval=RATE_REFRESH_INTERVAL):
+    """Start the background refresh task (call from a running event loop)"""
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.get_running_loop().create_task(refresh_rates_periodically(interval))
+    return _refresh_task
+
+async def stop_rate_refresher():
+    """Cancel the background refresh task"""
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+def get_bonbast_rates(fetch=True):
+    """Get Bonbast rates for Iranian Toman from the shared snapshot"""
+    return get_rate_snapshot().get_bonbast_rates(fetch)
+
+def get_irt_rates(fetch=True):
+    """IRT rates from Bonbast, or from the secondary source of the last hedged lookup"""
+    return get_rate_snapshot().get_irt_rates(fetch)
+
+def get_bonbast_rate(from_code, to_code, fetch=True):
+    """Get exchange rate between IRT and another currency using Bonbast (or a hedged fallback)"""
+    bonbast_rates = get_irt_rates(fetch)
     
     if not bonbast_rates:
         return None
@@ -116,26 +517,484 @@ def get_bonbast_rate(from_code, to_code):
     
     return None
 
-def get_live_rate(base, target):
-    """Fetch live rate from open.er-api.com"""
-    url = f"https://open.er-api.com/v6/latest/{base}"
+# Secondary providers raced when Bonbast is slow
+SECONDARY_IRT_SOURCES = ("live_files", "tgju", "alanchand")
+
+def _valid_quote(quote):
+    return bool(quote) and any(
+        isinstance(quote.get(field), (int, float)) and quote.get(field) > 0 for field in ("buy", "sell")
+    )
+
+def get_live_index():
+    """In-memory index of the scraped live files, or None when price_scrapers is unavailable"""
+    live_rates = _load_scraper("live_rates")
+    if live_rates is None:
+        return None
+    return live_rates.get_live_index(PRICE_DATA_DIR)
+
+def fetch_live_file_rates():
+    """
+    IRT rates from the scraped live files, consensus first.
+
+    The files are only re-read when their mtime changes, so this needs no
+    network and usually no JSON parsing.
+    """
+    index = get_live_index()
+    if index is None:
+        return {}
+    return index.rates(max_age=LIVE_FILE_MAX_AGE)
+
+def _load_scraper(name):
+    """The repo's price_scrapers.<name> module, or None when it can't be imported here"""
+    if REPO_ROOT not in sys.path:
+        sys.path.append(REPO_ROOT)
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        if data.get("result") == "success":
-            rate = data["rates"].get(target)
-            if rate:
-                logger.info(f"Fetched rate {base}->{target}: {rate}")
-                return rate
-    except requests.exceptions.Timeout:
-        logger.error(f"Timeout fetching rate for {base}->{target}")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request error fetching rate for {base}->{target}: {e}")
+        return importlib.import_module(f"price_scrapers.{name}")
+    except ImportError as e:
+        logger.info(f"Scraper {name} unavailable: {e}")
+        return None
+
+async def fetch_scraped_rates_async(name):
+    """Scrape the static page of tgju or alanchand over the pooled aiohttp session"""
+    scraper = _load_scraper(name)
+    if scraper is None:
+        return {}
+    try:
+        session = await get_http_session()
+        async with session.get(scraper.URL) as resp:
+            resp.raise_for_status()
+            html = await resp.text()
     except Exception as e:
-        logger.error(f"Error fetching rate for {base}->{target}: {e}")
+        logger.error(f"Error scraping {name}: {e}")
+        return {}
+
+    def parse():
+        now = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+        return scraper.build_result(scraper.normalize_rows(scraper.extract_rows(html)), now)
+
+    # HTML parsing is CPU bound; keep it off the event loop
+    data = await asyncio.get_running_loop().run_in_executor(None, parse)
+    return {
+        code: {"buy": quote.get("buy"), "sell": quote.get("sell"), "name": ""}
+        for code, quote in data.get("currencies", {}).items()
+    }
+
+async def fetch_irt_rates_from(source):
+    """IRT rates of one provider: 'bonbast', 'live_files', 'tgju' or 'alanchand'"""
+    if source == "bonbast":
+        snapshot = get_rate_snapshot()
+        await snapshot.ensure_fresh_async()
+        return snapshot.get_bonbast_rates(fetch=False)
+    if source == "live_files":
+        return fetch_live_file_rates()
+    breaker = get_circuit_breaker(source)
+    if not breaker.allow():
+        return {}
+    rates = await get_single_flight().do(f"scrape:{source}", lambda: fetch_scraped_rates_async(source))
+    breaker.record(bool(rates))
+    return rates
+
+# Which source answered each hedged lookup
+_hedge_wins = Counter()
+
+def get_hedge_stats():
+    """How many hedged IRT lookups each source has won"""
+    return dict(_hedge_wins)
+
+async def hedged_irt_lookup(code, delay=IRT_HEDGE_DELAY):
+    """
+    IRT rates quoting `code`, from the fastest provider.
+
+    Bonbast is asked first; if it hasn't answered with a valid quote within
+    `delay` seconds, the secondary providers are raced against it and the
+    first valid answer wins. A secondary winner's rates are kept in the rate
+    snapshot so conversions can use them.
+
+    Returns:
+        tuple: (source, rates) or (None, {}) if no provider had the currency
+    """
+    async def ask(source):
+        try:
+            return source, await fetch_irt_rates_from(source)
+        except Exception as e:
+            logger.error(f"Error getting IRT rates from {source}: {e}")
+            return source, {}
+
+    primary = asyncio.ensure_future(ask("bonbast"))
+    pending = {primary}
+    done, _ = await asyncio.wait(pending, timeout=delay)
+    if not done or not _valid_quote(primary.result()[1].get(code)):
+        logger.info(f"Bonbast has no {code} quote within {delay}s, hedging with secondary sources")
+        pending |= {asyncio.ensure_future(ask(source)) for source in SECONDARY_IRT_SOURCES}
+
+    winner, rates = None, {}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            source, result = task.result()
+            if _valid_quote(result.get(code)):
+                winner, rates = source, result
+                break
+        if winner:
+            break
+
+    # The Bonbast fetch is shared and keeps refreshing the snapshot; drop the rest
+    for task in pending:
+        if task is not primary:
+            task.cancel()
+
+    if winner:
+        _hedge_wins[winner] += 1
+        logger.info(f"Hedged IRT lookup for {code} won by {winner}")
+        if winner != "bonbast":
+            get_rate_snapshot().store_secondary(winner, rates)
+    return winner, rates
+
+ER_API_URL = "https://open.er-api.com/v6/latest/{base}"
+# Table every cross rate can be derived from when no better table is cached
+REFERENCE_BASE = "USD"
+# Used when a response has no usable time_next_update_unix
+RATES_TABLE_MIN_TTL = 60
+
+class RatesTableCache:
+    """
+    Whole open.er-api rate tables keyed by base currency.
+
+    Each table is kept until the time_next_update_unix of its response, and
+    any pair is derived from a single cached table, so upstream traffic is
+    about one request per base per update period. Expired tables are still
+    used for `stale_limit` seconds when no fresh one can be had.
+    """
+
+    def __init__(self, stale_limit=RATE_STALE_LIMIT):
+        self.stale_limit = stale_limit
+        self._tables = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, base):
+        with self._locks_guard:
+            return self._locks.setdefault(base, threading.Lock())
+
+    def _fresh(self, base):
+        table = self._tables.get(base)
+        if table and table["expires_at"] > time.time():
+            return table
+        return None
+
+    def _usable(self, base):
+        table = self._tables.get(base)
+        if table and table["expires_at"] + self.stale_limit > time.time():
+            return table
+        return None
+
+    def fetch_table(self, base):
+        """Download the rate table of a base currency and cache it"""
+        table = self._tables.get(base)
+        started = table["fetched_at"] if table else None
+        with self._lock(base):
+            table = self._fresh(base)
+            # Another thread fetched this table while we waited for the lock
+            if table and table["fetched_at"] != started:
+                return table
+            return self._fetch_table(base)
+
+    def _fetch_table(self, base):
+        breaker = get_circuit_breaker("er-api")
+        if not breaker.allow():
+            logger.warning(f"open.er-api circuit is open, skipping rates table for {base}")
+            return None
+        table = self._download_table(base)
+        breaker.record(table is not None)
+        return table
+
+    def _download_table(self, base):
+        url = ER_API_URL.format(base=base)
+        try:
+            resp = requests.get(url, timeout=10)
+            resp.raise_for_status()
+            data = resp.json()
+        except requests.exceptions.Timeout:
+            logger.error(f"Timeout fetching rates table for {base}")
+            return None
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Request error fetching rates table for {base}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching rates table for {base}: {e}")
+            return None
+        return self._store(base, data)
+
+    async def fetch_table_async(self, base):
+        """Async version of fetch_table(); concurrent calls for a base share one request"""
+        return await get_single_flight().do(f"er-api:{base}", lambda: self._fetch_table_async(base))
+
+    async def _fetch_table_async(self, base):
+        breaker = get_circuit_breaker("er-api")
+        if not breaker.allow():
+            logger.warning(f"open.er-api circuit is open, skipping rates table for {base}")
+            return None
+        table = await self._download_table_async(base)
+        breaker.record(table is not None)
+        return table
+
+    async def _download_table_async(self, base):
+        url = ER_API_URL.format(base=base)
+        try:
+            session = await get_http_session()
+            async with session.get(url) as resp:
+                resp.raise_for_status()
+                data = await resp.json(content_type=None)
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout fetching rates table for {base}")
+            return None
+        except aiohttp.ClientError as e:
+            logger.error(f"Request error fetching rates table for {base}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching rates table for {base}: {e}")
+            return None
+        return self._store(base, data)
+
+    def _store(self, base, data):
+        if data.get("result") != "success":
+            logger.error(f"Rates table for {base} unavailable: {data.get('error-type')}")
+            return None
+
+        now = time.time()
+        expires_at = data.get("time_next_update_unix") or 0
+        if expires_at <= now:
+            expires_at = now + RATES_TABLE_MIN_TTL
+        table = {"rates": data["rates"], "fetched_at": now, "expires_at": expires_at}
+        self._tables[base] = table
+        logger.info(f"Fetched rates table for {base} ({len(table['rates'])} currencies)")
+        return table
+
+    def reference_table(self, fetch=True):
+        """Table of REFERENCE_BASE: fresh, fetched if allowed, or stale within the limit"""
+        table = self._fresh(REFERENCE_BASE)
+        if not table and fetch:
+            table = self.fetch_table(REFERENCE_BASE)
+        return table or self._usable(REFERENCE_BASE)
+
+    def covers(self, *codes, stale=False):
+        """Whether a fresh (or, with stale, usable) cached table quotes all the given currencies"""
+        pick = self._usable if stale else self._fresh
+        for base in list(self._tables):
+            table = pick(base)
+            if table and all(table["rates"].get(code) for code in codes):
+                return True
+        return False
+
+    async def ensure_async(self, *codes):
+        """
+        Make sure a cached table covers the codes, without blocking the event loop.
+
+        A stale table is used as it is while the reference table is
+        refreshed in the background.
+        """
+        if self.covers(*codes):
+            return True
+        if self.covers(*codes, stale=True):
+            if not get_single_flight().in_flight(f"er-api:{REFERENCE_BASE}"):
+                asyncio.ensure_future(self.fetch_table_async(REFERENCE_BASE))
+            return True
+        return await self.fetch_table_async(REFERENCE_BASE) is not None
+
+    def dump(self):
+        """JSON-serializable copy of the cached tables, for save_rate_cache()"""
+        return dict(self._tables)
+
+    def restore(self, tables):
+        """Seed the cache from dump() output; tables past the staleness limit are dropped"""
+        now = time.time()
+        for base, table in tables.items():
+            current = self._tables.get(base)
+            if table["expires_at"] + self.stale_limit <= now:
+                continue
+            if current and current["fetched_at"] >= table["fetched_at"]:
+                continue
+            self._tables[base] = table
+
+    def _lookup(self, base, target, stale):
+        pick = self._usable if stale else self._fresh
+        table = pick(base)
+        if table and table["rates"].get(target):
+            return table["rates"][target]
+
+        # Derive the cross rate from any table that quotes both currencies
+        for other in list(self._tables):
+            table = pick(other)
+            if table and table["rates"].get(base) and table["rates"].get(target):
+                return table["rates"][target] / table["rates"][base]
+        return None
+
+    def get_rate(self, base, target, fetch=True):
+        """Rate base->target from the cached tables, fetching one table if needed and allowed"""
+        rate = self._lookup(base, target, stale=False)
+        if rate is None and fetch and not self._fresh(REFERENCE_BASE):
+            self.fetch_table(REFERENCE_BASE)
+            rate = self._lookup(base, target, stale=False)
+        if rate is None:
+            rate = self._lookup(base, target, stale=True)
+        return rate
+
+# Global rates table cache
+_rates_tables = None
+
+# Shared aiohttp session for the async conversion path
+_http_session = None
+
+async def get_http_session():
+    """Get or create the pooled aiohttp session (must be called from the event loop)"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+    return _http_session
+
+async def close_http_session():
+    """Close the pooled aiohttp session"""
+    global _http_session
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+
+def get_rates_tables():
+    """Get or create the process-wide rates table cache"""
+    global _rates_tables
+    if _rates_tables is None:
+        _rates_tables = RatesTableCache()
+    return _rates_tables
+
+def save_rate_cache(path=RATE_CACHE_FILE):
+    """Atomically write the rate snapshot and rates tables to `path`"""
+    data = {
+        "saved_at": time.time(),
+        "snapshot": get_rate_snapshot().dump(),
+        "tables": get_rates_tables().dump(),
+    }
+    tmp_path = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.error(f"Error saving rate cache: {e}")
+        return False
+    return True
+
+def load_rate_cache(path=RATE_CACHE_FILE):
+    """
+    Warm the rate snapshot and rates tables from a file written by save_rate_cache().
+
+    Rates keep their original fetch times, so the TTL and staleness limit
+    apply as if the process had never restarted.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        get_rate_snapshot().restore(data.get("snapshot") or {})
+        get_rates_tables().restore(data.get("tables") or {})
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.error(f"Error loading rate cache: {e}")
+        return False
+    snapshot = get_rate_snapshot()
+    logger.info(
+        f"Loaded rate cache: {len(snapshot.bonbast)} Bonbast rates ({snapshot.age():.0f}s old), "
+        f"{len(get_rates_tables().dump())} rates tables"
+    )
+    return True
+
+def get_live_rate(base, target, fetch=True):
+    """Live rate from open.er-api.com, served from the cached rate tables"""
+    rate = get_rates_tables().get_rate(base, target, fetch)
+    if rate:
+        logger.info(f"Rate {base}->{target}: {rate}")
+        return rate
+    logger.error(f"No rate available for {base}->{target}")
     return None
 
+# Pivots used for IRT legs of currencies Bonbast doesn't quote, in order of preference
+IRT_PIVOTS = ("EUR", "USD")
+
+def _positive(value):
+    return float(value) if isinstance(value, (int, float)) and value > 0 else np.nan
+
+class RateMatrix:
+    """
+    Dense cross-rate matrix over every supported currency, IRT included.
+
+    rates[i, j] converts one unit of codes[i] into codes[j]. IRT legs use the
+    Bonbast sell rate (foreign -> IRT) and buy rate (IRT -> foreign); a
+    currency Bonbast doesn't quote is priced through EUR, then USD, exactly
+    like the conversion chain. Other pairs come from the open.er-api table.
+    Missing pairs are NaN.
+    """
+
+    def __init__(self, codes, rates, built_at):
+        self.codes = codes
+        self.index = {code: i for i, code in enumerate(codes)}
+        self.rates = rates
+        self.built_at = built_at
+
+    @classmethod
+    def build(cls, bonbast_rates, usd_rates):
+        """Resolve every pair from one Bonbast snapshot and one USD-based rate table"""
+        codes = ["IRT"] + sorted(({c["code"] for c in CURRENCIES} | BONBAST_CURRENCIES) - {"IRT"})
+        index = {code: i for i, code in enumerate(codes)}
+
+        # Units of each currency per USD; NaN where unknown
+        per_usd = np.array([_positive(usd_rates.get(code)) for code in codes])
+        per_usd[0] = np.nan
+        # IRT per unit of each currency
+        irt_sell = np.array([_positive(bonbast_rates.get(code, {}).get("sell")) for code in codes])
+        irt_buy = np.array([_positive(bonbast_rates.get(code, {}).get("buy")) for code in codes])
+        irt_sell[0] = irt_buy[0] = 1.0
+
+        for pivot in IRT_PIVOTS:
+            p = index[pivot]
+            # one unit of X is per_usd[p] / per_usd[X] units of the pivot
+            via_pivot = per_usd[p] / per_usd
+            irt_sell = np.where(np.isnan(irt_sell), via_pivot * irt_sell[p], irt_sell)
+            irt_buy = np.where(np.isnan(irt_buy), via_pivot * irt_buy[p], irt_buy)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = per_usd[None, :] / per_usd[:, None]
+            rates[:, 0] = irt_sell
+            rates[0, :] = 1.0 / irt_buy
+        np.fill_diagonal(rates, 1.0)
+        return cls(codes, rates, time.time())
+
+    def rate(self, from_code, to_code):
+        """Conversion rate from_code -> to_code, or None if unknown"""
+        i = self.index.get(from_code)
+        j = self.index.get(to_code)
+        if i is None or j is None:
+            return None
+        rate = self.rates[i, j]
+        return float(rate) if np.isfinite(rate) and rate > 0 else None
+
+# Global matrix, rebuilt whenever one of its inputs was refreshed
+_rate_matrix = None
+_rate_matrix_inputs = None
+
+def get_rate_matrix(fetch=True):
+    """Cross-rate matrix for the current rate snapshot and rate table"""
+    global _rate_matrix, _rate_matrix_inputs
+    snapshot = get_rate_snapshot()
+    bonbast_rates = snapshot.get_irt_rates(fetch)
+    table = get_rates_tables().reference_table(fetch)
+    inputs = (snapshot.version() if bonbast_rates else None, table["fetched_at"] if table else None)
+    if _rate_matrix is None or inputs != _rate_matrix_inputs:
+        _rate_matrix = RateMatrix.build(bonbast_rates, table["rates"] if table else {})
+        _rate_matrix_inputs = inputs
+    return _rate_matrix
+
 def format_result(result, target_currency):
     """Format conversion result based on target currency"""
     if result is None:
@@ -149,7 +1008,7 @@ def format_result(result, target_currency):
         # For other currencies, show up to 4 decimals, removing trailing zeros
         return f"{result:,.4f}".rstrip('0').rstrip('.')
 
-def convert_currency_with_rate(amount, from_code, to_code):
+def convert_currency_with_rate(amount, from_code, to_code, fetch=True):
     """
     Main conversion logic - prioritizes Bonbast for IRT conversions
     
@@ -157,6 +1016,7 @@ def convert_currency_with_rate(amount, from_code, to_code):
         amount (float): Amount to convert
         from_code (str): Source currency code
         to_code (str): Target currency code
+        fetch (bool): Fetch expired rates upstream; when False only cached rates are used
     
     Returns:
         tuple: (formatted_result, conversion_rate) or (None, None) if conversion failed
@@ -166,10 +1026,17 @@ def convert_currency_with_rate(amount, from_code, to_code):
         return format_result(amount, to_code), 1.0
     
     logger.info(f"Converting {amount} {from_code} to {to_code}")
+
+    # Every fallback below is already resolved in the cross-rate matrix
+    rate = get_rate_matrix(fetch).rate(from_code, to_code)
+    if rate:
+        result = round(amount * rate, 4)
+        logger.info(f"Matrix conversion successful: {amount} {from_code} = {result} {to_code}")
+        return format_result(result, to_code), rate
     
     # Case 1: Direct IRT conversions using Bonbast
     if from_code == "IRT" or to_code == "IRT":
-        bonbast_rate = get_bonbast_rate(from_code, to_code)
+        bonbast_rate = get_bonbast_rate(from_code, to_code, fetch=fetch)
         if bonbast_rate:
             result = round(amount * bonbast_rate, 4)
             logger.info(f"Bonbast conversion successful: {amount} {from_code} = {result} {to_code}")
@@ -180,10 +1047,10 @@ def convert_currency_with_rate(amount, from_code, to_code):
         
         if to_code == "IRT":
             # Convert from_code to EUR first, then EUR to IRT
-            eur_rate = get_live_rate(from_code, "EUR")
+            eur_rate = get_live_rate(from_code, "EUR", fetch=fetch)
             if eur_rate:
                 eur_amount = amount * eur_rate
-                irt_rate = get_bonbast_rate("EUR", "IRT")
+                irt_rate = get_bonbast_rate("EUR", "IRT", fetch=fetch)
                 if irt_rate:
                     result = round(eur_amount * irt_rate, 4)
                     combined_rate = eur_rate * irt_rate
@@ -192,10 +1059,10 @@ def convert_currency_with_rate(amount, from_code, to_code):
                     
         elif from_code == "IRT":
             # Convert IRT to EUR first, then EUR to to_code
-            eur_rate = get_bonbast_rate("IRT", "EUR")
+            eur_rate = get_bonbast_rate("IRT", "EUR", fetch=fetch)
             if eur_rate:
                 eur_amount = amount * eur_rate
-                target_rate = get_live_rate("EUR", to_code)
+                target_rate = get_live_rate("EUR", to_code, fetch=fetch)
                 if target_rate:
                     result = round(eur_amount * target_rate, 4)
                     combined_rate = eur_rate * target_rate
@@ -207,10 +1074,10 @@ def convert_currency_with_rate(amount, from_code, to_code):
         
         if to_code == "IRT":
             # Convert from_code to USD first, then USD to IRT
-            usd_rate = get_live_rate(from_code, "USD")
+            usd_rate = get_live_rate(from_code, "USD", fetch=fetch)
             if usd_rate:
                 usd_amount = amount * usd_rate
-                irt_rate = get_bonbast_rate("USD", "IRT")
+                irt_rate = get_bonbast_rate("USD", "IRT", fetch=fetch)
                 if irt_rate:
                     result = round(usd_amount * irt_rate, 4)
                     combined_rate = usd_rate * irt_rate
@@ -219,10 +1086,10 @@ def convert_currency_with_rate(amount, from_code, to_code):
                     
         elif from_code == "IRT":
             # Convert IRT to USD first, then USD to to_code
-            usd_rate = get_bonbast_rate("IRT", "USD")
+            usd_rate = get_bonbast_rate("IRT", "USD", fetch=fetch)
             if usd_rate:
                 usd_amount = amount * usd_rate
-                target_rate = get_live_rate("USD", to_code)
+                target_rate = get_live_rate("USD", to_code, fetch=fetch)
                 if target_rate:
                     result = round(usd_amount * target_rate, 4)
                     combined_rate = usd_rate * target_rate
@@ -230,7 +1097,7 @@ def convert_currency_with_rate(amount, from_code, to_code):
                     return format_result(result, to_code), combined_rate
     
     # Case 4: Global pairs (non-IRT)
-    rate = get_live_rate(from_code, to_code)
+    rate = get_live_rate(from_code, to_code, fetch=fetch)
     if rate:
         result = round(amount * rate, 4)
         logger.info(f"Global conversion successful: {amount} {from_code} = {result} {to_code}")
@@ -239,6 +1106,106 @@ def convert_currency_with_rate(amount, from_code, to_code):
     logger.error(f"All conversion methods failed for {amount} {from_code} to {to_code}")
     return None, None
 
+async def prefetch_rates_async(from_code, to_code):
+    """Load the rates a conversion needs into the caches without blocking the event loop"""
+    if from_code == to_code:
+        return
+    other = to_code if from_code == "IRT" else from_code
+    if "IRT" in (from_code, to_code):
+        snapshot = get_rate_snapshot()
+        if snapshot.has_fresh_quote(other):
+            return
+        # Race secondary sources if Bonbast is slow or lacks the currency
+        await hedged_irt_lookup(other)
+        if get_bonbast_rate(from_code, to_code, fetch=False):
+            return
+        # The EUR/USD fallbacks need the er-api rates of the other currency
+        await get_rates_tables().ensure_async(other, "EUR", "USD")
+    else:
+        await get_rates_tables().ensure_async(from_code, to_code)
+
+def has_cached_rate(from_code, to_code):
+    """Whether the caches can answer a conversion, with fresh or stale rates"""
+    return from_code == to_code or get_rate_matrix(fetch=False).rate(from_code, to_code) is not None
+
+async def prefetch_within_budget(from_code, *to_codes, budget=CONVERSION_LATENCY_BUDGET):
+    """
+    Prefetch rates for a conversion, waiting at most `budget` seconds.
+
+    Fetches that take longer keep running in the background (so the next
+    conversion benefits) and the conversion goes ahead with cached rates.
+    The budget only applies when cached rates exist for every target; on a
+    cold cache the conversion waits up to COLD_FETCH_TIMEOUT instead, as a
+    slow answer beats none.
+    """
+    cold = [to_code for to_code in to_codes if not has_cached_rate(from_code, to_code)]
+    timeout = COLD_FETCH_TIMEOUT if cold else budget
+    prefetch = asyncio.gather(*(prefetch_rates_async(from_code, to_code) for to_code in to_codes))
+    try:
+        await asyncio.wait_for(asyncio.shield(prefetch), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Rate fetch exceeded {timeout}s, converting with cached rates")
+
+async def convert_currency_with_rate_async(amount, from_code, to_code):
+    """
+    Async version of convert_currency_with_rate() for the bot handlers
+
+    Missing rates are fetched with the pooled aiohttp session and the async
+    Bonbast provider; the conversion itself then only reads cached rates.
+    """
+    await prefetch_within_budget(from_code, to_code)
+    return convert_currency_with_rate(amount, from_code, to_code, fetch=False)
+
+def convert_batch(amounts, from_code, to_codes, fetch=True):
+    """
+    Convert several amounts into several target currencies at once
+    
+    All rates come from the same snapshot (one cross-rate matrix); the
+    results are computed as one outer product.
+    
+    Args:
+        amounts (list): Amounts to convert
+        from_code (str): Source currency code
+        to_codes (list): Target currency codes
+        fetch (bool): Fetch expired rates upstream; when False only cached rates are used
+    
+    Returns:
+        dict: {"from", "amounts", "targets", "rates": {target: rate or None},
+        "results": one row per amount of formatted results (None where the
+        conversion failed)}
+    """
+    matrix = get_rate_matrix(fetch)
+    rates = []
+    for to_code in to_codes:
+        if to_code == from_code:
+            rate = 1.0
+        else:
+            rate = matrix.rate(from_code, to_code)
+            if rate is None:
+                # Same fallback chain as single conversions
+                rate = convert_currency_with_rate(1, from_code, to_code, fetch=fetch)[1]
+        rates.append(rate if rate else np.nan)
+
+    values = np.round(np.outer(np.asarray(amounts, dtype=float), np.asarray(rates, dtype=float)), 4)
+    results = [
+        [format_result(float(value), to_code) if np.isfinite(value) else None
+         for value, to_code in zip(row, to_codes)]
+        for row in values
+    ]
+    logger.info(f"Batch conversion: {len(amounts)} amounts of {from_code} to {', '.join(to_codes)}")
+    return {
+        "from": from_code,
+        "amounts": list(amounts),
+        "targets": list(to_codes),
+        "rates": {to_code: (float(rate) if np.isfinite(rate) else None) for to_code, rate in zip(to_codes, rates)},
+        "results": results,
+    }
+
+async def convert_batch_async(amounts, from_code, to_codes):
+    """Async version of convert_batch() for the bot handlers"""
+    await prefetch_within_budget(from_code, *to_codes)
+    return convert_batch(amounts, from_code, to_codes, fetch=False)
+
 def convert_currency(amount, from_code, to_code):
     """
     Main conversion logic - prioritizes Bonbast for IRT conversions
@@ -74,6 +74,45 @@ def format_conversion_result(amount: float, from_currency: str, to_currency: str
         f"_Rate calculated using Bonbast & ExchangeRate API_"
     )
 
+def format_batch_result(batch: dict, name_of) -> str:
+    """
+    Format a batch conversion table as one message
+    
+    Args:
+        batch: Result of convert_batch()
+        name_of: Function mapping a currency code to its full name
+    
+    Returns:
+        Formatted message string
+    """
+    from_currency = batch["from"]
+    lines = ["✅ **Conversion Result**", ""]
+    for amount, row in zip(batch["amounts"], batch["results"]):
+        lines.append(f"💰 **{amount:,.10g} {name_of(from_currency)}**")
+        for to_currency, result in zip(batch["targets"], row):
+            if result is None:
+                lines.append(f"🟰 {to_currency}: unavailable")
+            else:
+                lines.append(f"🟰 **{result} {to_currency}**")
+        lines.append("")
+    
+    rate_lines = []
+    for to_currency, rate in batch["rates"].items():
+        if not rate or to_currency == from_currency:
+            continue
+        if to_currency == "IRT":
+            rate_lines.append(f"1 {from_currency} = {rate:,.0f} IRT")
+        elif from_currency == "IRT":
+            rate_lines.append(f"1 {to_currency} = {1 / rate:,.0f} IRT")
+        else:
+            rate_lines.append(f"1 {from_currency} = {rate:,.4f}".rstrip('0').rstrip('.') + f" {to_currency}")
+    if rate_lines:
+        lines.append("📊 **Rates:** " + " | ".join(rate_lines))
+    lines.append(f"📅 **Date:** {datetime.now().strftime('%d/%m/%Y')}")
+    lines.append("")
+    lines.append("_Rate calculated using Bonbast & ExchangeRate API_")
+    return "\n".join(lines)
+
 def validate_amount(amount_text: str) -> tuple[bool, float, str]:
     """
     Validate and parse amount input
@@ -92,6 +131,31 @@ def validate_amount(amount_text: str) -> tuple[bool, float, str]:
     except ValueError:
         return False, 0.0, "Please enter a valid number."
 
+def validate_amounts(amounts_text: str, max_amounts: int) -> tuple[bool, list, str]:
+    """
+    Validate and parse several whitespace-separated amounts
+    
+    Args:
+        amounts_text: Input text to validate
+        max_amounts: Most amounts accepted at once
+    
+    Returns:
+        Tuple of (is_valid, parsed_amounts, error_message); the error message
+        is empty when the text holds fewer than two amounts
+    """
+    parts = amounts_text.split()
+    if len(parts) < 2:
+        return False, [], ""
+    if len(parts) > max_amounts:
+        return False, [], f"Please send at most {max_amounts} amounts at once."
+    amounts = []
+    for part in parts:
+        is_valid, amount, error_msg = validate_amount(part)
+        if not is_valid:
+            return False, [], error_msg
+        amounts.append(amount)
+    return True, amounts, ""
+
 def create_currency_keyboard_with_default(currencies: List[str], user_id: int, prefix: str = "") -> InlineKeyboardMarkup:
     """
     Create a keyboard with currencies and default pair button if user has one
@@ -0,0 +1,78 @@
+"""
+Messages holding several amounts are converted in one batch reply.
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Add bot root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.handlers import messages
+from src.utils.keyboards import validate_amounts
+
+
+def _update(text):
+    update = mock.MagicMock()
+    update.message.text = text
+    update.message.from_user.id = 42
+    update.message.forward_origin = None
+    update.message.reply_text = mock.AsyncMock(return_value=mock.AsyncMock())
+    return update
+
+
+class ValidateAmountsTest(unittest.TestCase):
+    def test_several_amounts(self):
+        self.assertEqual(validate_amounts("10 2.5  100", 10), (True, [10.0, 2.5, 100.0], ""))
+
+    def test_single_amount_is_not_a_batch(self):
+        self.assertEqual(validate_amounts("10", 10), (False, [], ""))
+
+    def test_invalid_amount(self):
+        is_valid, amounts, error_msg = validate_amounts("10 -5", 10)
+        self.assertFalse(is_valid)
+        self.assertEqual(error_msg, "Please enter a positive number.")
+
+    def test_too_many_amounts(self):
+        is_valid, amounts, error_msg = validate_amounts("1 2 3", 2)
+        self.assertFalse(is_valid)
+        self.assertIn("at most 2", error_msg)
+
+
+class BatchMessageTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.batch = {
+            "from": "EUR", "amounts": [10.0, 20.0], "targets": ["IRT"],
+            "rates": {"IRT": 100000.0}, "results": [["1,000,000"], ["2,000,000"]],
+        }
+        patches = [
+            mock.patch.object(messages, "has_valid_session", return_value=False),
+            mock.patch.object(messages, "get_user_default_pair", return_value=None),
+            mock.patch.object(messages, "convert_batch_async", mock.AsyncMock(return_value=self.batch)),
+            mock.patch.object(messages, "convert_currency_with_rate_async", mock.AsyncMock()),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_several_numbers_use_one_batch(self):
+        update = _update("10 20")
+        await messages.handle_general_message(update, None)
+
+        messages.convert_batch_async.assert_awaited_once_with([10.0, 20.0], "EUR", ["IRT"])
+        messages.convert_currency_with_rate_async.assert_not_awaited()
+        reply = update.message.reply_text.return_value.edit_text.await_args.args[0]
+        self.assertIn("1,000,000 IRT", reply)
+        self.assertIn("2,000,000 IRT", reply)
+
+    async def test_single_number_is_not_batched(self):
+        messages.convert_currency_with_rate_async.return_value = ("1,000,000", 100000.0)
+        await messages.handle_general_message(_update("10"), None)
+
+        messages.convert_batch_async.assert_not_awaited()
+        messages.convert_currency_with_rate_async.assert_awaited_once_with(10.0, "EUR", "IRT")
+
+
+if __name__ == "__main__":
+    unittest.main()
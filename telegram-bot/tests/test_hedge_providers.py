@@ -0,0 +1,46 @@
+"""
+The tgju and alanchand hedge providers must load in a bot install,
+which has no selenium.
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Add bot root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import currency_converter
+
+SCRAPERS = ("tgju", "alanchand")
+
+
+class HedgeProvidersWithoutSeleniumTest(unittest.TestCase):
+    def setUp(self):
+        # sys.modules is restored after each test
+        patcher = mock.patch.dict(sys.modules)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Drop cached scraper modules so they are imported again below
+        for name in list(sys.modules):
+            if name.startswith(("price_scrapers", "selenium")):
+                del sys.modules[name]
+        # A None entry makes any "import selenium" raise ImportError
+        sys.modules["selenium"] = None
+
+    def test_scrapers_import_without_selenium(self):
+        for name in SCRAPERS:
+            with self.subTest(scraper=name):
+                scraper = currency_converter._load_scraper(name)
+                self.assertIsNotNone(scraper)
+                for attr in ("URL", "extract_rows", "normalize_rows", "build_result"):
+                    self.assertTrue(hasattr(scraper, attr))
+
+    def test_selenium_fallback_needs_selenium(self):
+        tgju = currency_converter._load_scraper("tgju")
+        with self.assertRaises(ImportError):
+            tgju.get_tgju_rates_selenium()
+
+
+if __name__ == "__main__":
+    unittest.main()
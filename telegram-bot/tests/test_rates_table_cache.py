@@ -0,0 +1,39 @@
+"""
+RatesTableCache must derive cross rates whenever a single table lacks a pair.
+"""
+import os
+import sys
+import time
+import unittest
+
+# Add bot root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.currency_converter import RatesTableCache
+
+
+def _table(rates):
+    now = time.time()
+    return {"rates": rates, "fetched_at": now, "expires_at": now + 3600}
+
+
+class RatesTableCacheLookupTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = RatesTableCache()
+        self.cache.restore({
+            "USD": _table({"USD": 1, "EUR": 0.5, "IRR": 42000}),
+            "EUR": _table({"EUR": 1, "USD": 2}),
+        })
+
+    def test_direct_rate_from_base_table(self):
+        self.assertEqual(self.cache.get_rate("EUR", "USD", fetch=False), 2)
+
+    def test_cross_rate_when_base_table_lacks_target(self):
+        self.assertEqual(self.cache.get_rate("EUR", "IRR", fetch=False), 84000)
+
+    def test_unknown_pair(self):
+        self.assertIsNone(self.cache.get_rate("EUR", "XYZ", fetch=False))
+
+
+if __name__ == "__main__":
+    unittest.main()